@@ -0,0 +1,460 @@
+"""ASGI entry point serving the same routes as the Flask app in main.py.
+
+    uvicorn asgi:app --workers 4
+
+CPU-bound conversion runs on a thread pool (CONVERT_THREADS) so it never
+blocks the event loop. /convert-english talks to the upstream with httpx
+and asyncio, so thousands of lookups can wait on the upstream at once
+without one thread each. The English path reuses the caches, breaker and
+settings from main; only the concurrency cap is an asyncio semaphore.
+Metrics (METRICS_ENABLED) go to main's registry and are served on /metrics;
+profiling (PROFILING_ENABLED, PROFILE_SAMPLE_INTERVAL) works as in main.
+"""
+import asyncio
+import codecs
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+import httpx
+
+import main
+from cache import AsyncSingleFlight
+from resilience import UpstreamBusyError, UpstreamUnavailable
+
+CONVERT_THREADS = int(os.environ.get('CONVERT_THREADS', '4'))
+convert_executor = ThreadPoolExecutor(max_workers=CONVERT_THREADS, thread_name_prefix='convert')
+
+upstream_flight = AsyncSingleFlight()
+_state = {'client': None, 'semaphore': None, 'in_flight': 0}
+
+SECURITY_HEADERS = [
+    (b'access-control-allow-origin', b'*'),
+    (b'access-control-allow-methods', b'GET, POST, OPTIONS'),
+    (b'access-control-allow-headers', b'Content-Type'),
+    (b'content-security-policy', b'frame-ancestors *'),
+    (b'x-frame-options', b'ALLOWALL'),
+]
+
+PAGES = {
+    '/': 'index.html',
+    '/newversionforgeorgian': 'index-new.html',
+    '/latin': 'index-latin.html',
+    '/english': 'index-english.html',
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or []
+
+
+# ---------------- Response helpers ----------------
+async def send_response(send, status, body, content_type, headers=None):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', content_type), (b'content-length', str(len(body)).encode())]
+                   + SECURITY_HEADERS + (headers or []),
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def send_json(send, obj, status=200, headers=None):
+    body = json.dumps(obj, ensure_ascii=False).encode('utf-8')
+    await send_response(send, status, body, b'application/json', headers)
+
+
+async def read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+async def read_json(scope, receive):
+    content_type = dict(scope['headers']).get(b'content-type', b'')
+    if not content_type.split(b';')[0].strip().endswith(b'json'):
+        raise HTTPError(400, "Request must be JSON")
+    try:
+        data = json.loads(await read_body(receive) or b'null')
+    except ValueError:
+        data = None
+    if data is None:
+        raise HTTPError(400, "Invalid JSON data")
+    if isinstance(data, dict):
+        scope['input_language'] = data.get('input_language')
+    return data
+
+
+async def run_in_executor(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(convert_executor, fn, *args)
+
+
+# ---------------- Conversion routes ----------------
+def query_args(scope):
+    return {k: v[-1] for k, v in parse_qs(scope.get('query_string', b'').decode()).items()}
+
+
+async def convert_route(scope, receive, send):
+    data = await read_json(scope, receive)
+    headers = dict(scope['headers'])
+    profile_format = headers.get(b'x-profile', b'').decode() or query_args(scope).get('profile')
+    if main.PROFILING_ENABLED and profile_format:
+        refused = main.check_profile_access(profile_format, headers.get(b'x-profile-token', b'').decode())
+        if refused is not None:
+            raise HTTPError(refused[1], refused[0])
+        return await send_json(send, await run_in_executor(main.profiled_convert, data, profile_format))
+    await send_json(send, await run_in_executor(main.convert, data))
+
+
+async def convert_batch_route(scope, receive, send):
+    data = await read_json(scope, receive)
+    items = data.get('items')
+    if not isinstance(items, list):
+        raise HTTPError(400, "items must be a list")
+    if len(items) > main.MAX_BATCH_ITEMS:
+        raise HTTPError(413, f"At most {main.MAX_BATCH_ITEMS} items per batch")
+    defaults = {k: v for k, v in data.items() if k != 'items'}
+    await send_json(send, {"results": await run_in_executor(main.convert_batch, items, defaults)})
+
+
+async def convert_stream_route(scope, receive, send):
+    args = query_args(scope)
+    defaults = {}
+    for key in ('input_language', 'geo_target', 'max_variants'):
+        if key in args:
+            defaults[key] = args[key]
+    for key in ('include_tones', 'show_case_suffix', 'use_apostrophes'):
+        if key in args:
+            defaults[key] = args[key].lower() in ('1', 'true', 'yes')
+    input_format = args.get('format', 'auto')
+
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [(b'content-type', b'application/x-ndjson')] + SECURITY_HEADERS,
+    })
+    pending = b''
+    more_body = True
+    while more_body:
+        message = await receive()
+        more_body = message.get('more_body', False)
+        pending += message.get('body', b'')
+        lines = pending.split(b'\n')
+        pending = b'' if not more_body else lines.pop()
+        for line in lines:
+            # The response has started, so a failure becomes that line's record
+            try:
+                out = await run_in_executor(_convert_stream_line, line, defaults, input_format)
+            except Exception as e:
+                main.app.logger.error(f"Error in /convert/stream: {str(e)}")
+                out = json.dumps({"error": str(e)}, ensure_ascii=False) + '\n'
+            if out:
+                await send({'type': 'http.response.body', 'body': out.encode('utf-8'), 'more_body': True})
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+def _convert_stream_line(line, defaults, input_format):
+    return next(main.iter_convert_lines([line], defaults, input_format), '')
+
+
+async def _iter_body(receive):
+    while True:
+        message = await receive()
+        if message.get('body'):
+            yield message['body']
+        if not message.get('more_body'):
+            return
+
+
+async def convert_georgian_stream_route(scope, receive, send):
+    """Raw-body variant of the Flask route; multipart uploads need main.app."""
+    args = query_args(scope)
+    target = args.get('target', 'mkhedruli')
+    if target not in main.GEORGIAN_STREAM_TARGETS:
+        raise HTTPError(400, f"target must be one of {', '.join(main.GEORGIAN_STREAM_TARGETS)}")
+    use_apostrophes = args.get('use_apostrophes', '1').lower() in ('1', 'true', 'yes')
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [(b'content-type', b'text/plain; charset=utf-8')] + SECURITY_HEADERS,
+    })
+    convert_text = main.georgian_text_converter(target, use_apostrophes)
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    async for chunk in _iter_body(receive):
+        text = decoder.decode(chunk)
+        if text:
+            await send({'type': 'http.response.body', 'body': convert_text(text).encode('utf-8'), 'more_body': True})
+    await send({'type': 'http.response.body', 'body': decoder.decode(b'', final=True).encode('utf-8')})
+
+
+async def convert_incremental_route(scope, receive, send):
+    data = await read_json(scope, receive)
+    if not isinstance(data, dict):
+        raise HTTPError(400, "Invalid JSON data")
+    body, status = await run_in_executor(main.convert_incremental, data)
+    await send_json(send, body, status)
+
+
+async def cache_stats_route(scope, receive, send):
+    await send_json(send, dict(main.result_cache.stats(), special_cases=main.special_cases_stats()))
+
+
+# ---------------- English upstream (async) ----------------
+async def _guarded_upstream(request, call='upstream'):
+    """Async twin of main._guarded_upstream: semaphore, then circuit breaker."""
+    semaphore = _state['semaphore']
+    try:
+        await asyncio.wait_for(semaphore.acquire(), main.upstream_limiter.wait_timeout)
+    except asyncio.TimeoutError:
+        raise UpstreamBusyError()
+    _state['in_flight'] += 1
+    probe = False
+    try:
+        probe = main.upstream_breaker.before_call()
+        started = time.perf_counter()
+        try:
+            response = await request()
+        except httpx.HTTPError:
+            # upstream_flight runs the call under asyncio.shield, so the deadline never
+            # cancels it; a cancellation here is a shutdown, not an upstream failure.
+            main.upstream_seconds.observe(time.perf_counter() - started, call, 'transport_error')
+            main.upstream_breaker.record_failure()
+            raise
+        main.upstream_seconds.observe(time.perf_counter() - started, call, main.upstream_outcome(response.status_code))
+        if response.status_code >= 500:
+            main.upstream_breaker.record_failure()
+        else:
+            main.upstream_breaker.record_success()
+        response.raise_for_status()
+        return response.json()
+    finally:
+        if probe:
+            main.upstream_breaker.release_probe()
+        _state['in_flight'] -= 1
+        semaphore.release()
+
+
+async def _cached_upstream_call(cache, key, fetch):
+    data = cache.get(key)
+    if data is not None:
+        return data
+
+    async def load():
+        data = await fetch()
+        if data.get('success'):
+            cache.put(key, data)
+        return data
+
+    return await upstream_flight.do(key, load)
+
+
+async def fetch_suggestions(word, timeout):
+    client = _state['client']
+    return await _cached_upstream_call(main.suggestions_cache, ('suggestions', word), lambda: _guarded_upstream(
+        lambda: client.get(main.ENGLISH_API_URL, params={"action": "suggestions", "q": word}, timeout=timeout),
+        'suggestions',
+    ))
+
+
+async def fetch_transliteration(word, timeout):
+    client = _state['client']
+    return await _cached_upstream_call(main.transliteration_cache, ('transliterate', word), lambda: _guarded_upstream(
+        lambda: client.post(
+            main.ENGLISH_API_URL, params={"action": "transliterate"}, json={"word": word}, timeout=timeout
+        ),
+        'transliterate',
+    ))
+
+
+async def _transliterate_suggestion(suggestion, timeout):
+    data = await fetch_transliteration(suggestion.get('word', ''), timeout)
+    return main.build_transliteration_result(suggestion, data)
+
+
+async def convert_english_route(scope, receive, send):
+    data = await read_json(scope, receive)
+    word = data.get('word', '').strip()
+    if not word:
+        raise HTTPError(400, "Word is required")
+    deadline = time.monotonic() + main.ENGLISH_REQUEST_DEADLINE
+
+    try:
+        suggestions_data = await asyncio.wait_for(
+            fetch_suggestions(word, main.ENGLISH_UPSTREAM_TIMEOUT), main._remaining(deadline)
+        )
+    except UpstreamUnavailable as e:
+        raise HTTPError(503, f"Transliteration service unavailable: {str(e)}",
+                        [(b'retry-after', str(e.retry_after).encode())])
+    except Exception as e:
+        raise HTTPError(500, f"Failed to fetch suggestions: {str(e) or type(e).__name__}")
+
+    if not suggestions_data.get('success') or not suggestions_data.get('data', {}).get('suggestions'):
+        raise HTTPError(404, "No suggestions found")
+
+    suggestions = [s for s in suggestions_data['data']['suggestions'] if s.get('word', '')]
+    tasks = [
+        asyncio.ensure_future(_transliterate_suggestion(s, main.ENGLISH_UPSTREAM_TIMEOUT))
+        for s in suggestions
+    ]
+    partial = False
+    if tasks:
+        done, not_done = await asyncio.wait(tasks, timeout=max(0, deadline - time.monotonic()))
+        for task in not_done:
+            task.cancel()
+        partial = bool(not_done)
+    results = []
+    errors = []
+    for suggestion, task in zip(suggestions, tasks):
+        if not task.done() or task.cancelled():
+            continue
+        if task.exception() is not None:
+            if not isinstance(task.exception(), UpstreamUnavailable):
+                main.app.logger.error(f"Failed to transliterate {suggestion.get('word', '')}: {str(task.exception())}")
+            errors.append(task.exception())
+            partial = True
+            continue
+        if task.result() is not None:
+            results.append(task.result())
+    try:
+        main.raise_if_all_unavailable(results, errors)
+    except UpstreamUnavailable as e:
+        raise HTTPError(503, f"Transliteration service unavailable: {str(e)}",
+                        [(b'retry-after', str(e.retry_after).encode())])
+
+    if not results:
+        raise HTTPError(404, "No transliterations found")
+    await send_json(send, {
+        "success": True,
+        "query": word,
+        "results": [r for r in results if r.get('relevance', 0) >= 200],
+        "variants": [r for r in results if r.get('relevance', 0) < 200],
+        "partial": partial
+    })
+
+
+async def english_status_route(scope, receive, send):
+    await send_json(send, {
+        "breaker": main.upstream_breaker.stats(),
+        "concurrency": {"limit": main.upstream_limiter.limit, "in_flight": _state['in_flight']},
+        "suggestions_cache": main.suggestions_cache.stats(),
+        "transliteration_cache": main.transliteration_cache.stats(),
+        "coalesced": upstream_flight.coalesced,
+    })
+
+
+async def metrics_route(scope, receive, send):
+    if not main.metrics.enabled:
+        raise HTTPError(404, "Metrics are disabled; set METRICS_ENABLED=1")
+    await send_response(send, 200, main.metrics.render().encode('utf-8'), b'text/plain; version=0.0.4')
+
+
+async def profile_samples_route(scope, receive, send):
+    sampler = main.stack_sampler
+    if sampler is None:
+        raise HTTPError(404, "Stack sampling is disabled; set PROFILE_SAMPLE_INTERVAL")
+    refused = main.check_profile_access(None, dict(scope['headers']).get(b'x-profile-token', b'').decode())
+    if refused is not None:
+        raise HTTPError(refused[1], refused[0])
+    body = sampler.collapsed().encode('utf-8')
+    samples = str(sampler.samples).encode()
+    if query_args(scope).get('reset', '').lower() in ('1', 'true', 'yes'):
+        sampler.reset()
+    await send_response(send, 200, body, b'text/plain; charset=utf-8', [(b'x-profile-samples', samples)])
+
+
+async def page_route(scope, receive, send):
+    template = main.app.jinja_env.get_template(PAGES[scope['path']])
+    await send_response(send, 200, template.render().encode('utf-8'), b'text/html; charset=utf-8')
+
+
+ROUTES = {
+    ('POST', '/convert'): convert_route,
+    ('POST', '/convert/batch'): convert_batch_route,
+    ('POST', '/convert/stream'): convert_stream_route,
+    ('POST', '/convert/incremental'): convert_incremental_route,
+    ('POST', '/convert/georgian/stream'): convert_georgian_stream_route,
+    ('GET', '/convert/cache'): cache_stats_route,
+    ('POST', '/convert-english'): convert_english_route,
+    ('GET', '/convert-english/status'): english_status_route,
+    ('GET', '/metrics'): metrics_route,
+    ('GET', '/debug/profile/samples'): profile_samples_route,
+}
+CONVERT_PATHS = ('/convert', '/convert/batch', '/convert/stream', '/convert/incremental')
+ROUTES.update({('GET', path): page_route for path in PAGES})
+
+
+# ---------------- ASGI application ----------------
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            _startup()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            if _state['client'] is not None:
+                await _state['client'].aclose()
+                _state['client'] = None
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+def _startup():
+    if main.stack_sampler is not None and not main.stack_sampler.running:
+        main.stack_sampler.start()
+    if _state['client'] is None:
+        _state['client'] = httpx.AsyncClient(
+            verify=False,
+            limits=httpx.Limits(max_connections=main.upstream_limiter.limit,
+                                max_keepalive_connections=main.upstream_limiter.limit),
+        )
+        _state['semaphore'] = asyncio.Semaphore(main.upstream_limiter.limit)
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    if scope['type'] != 'http':
+        return
+    _startup()
+    method = scope['method']
+    path = scope['path'].rstrip('/') or '/'
+    handler = ROUTES.get((method, path))
+    if main.metrics.enabled:
+        send = _recording_send(scope, send, path if any(p == path for _, p in ROUTES) else 'unmatched')
+    if method == 'OPTIONS' and any(p == path for _, p in ROUTES):
+        return await send_response(send, 200, b'', b'text/html; charset=utf-8')
+    if handler is None:
+        return await send_json(send, {"error": "Not found"}, 404)
+    try:
+        await handler(scope, receive, send)
+    except HTTPError as e:
+        await send_json(send, {"error": str(e)}, e.status, e.headers)
+    except Exception as e:
+        main.app.logger.error(f"Error in {path}: {str(e)}")
+        await send_json(send, {"error": str(e)}, 500)
+
+
+def _recording_send(scope, send, route):
+    """Wrap send so the request is counted once its last body chunk goes out."""
+    started = time.perf_counter()
+    status = []
+
+    async def recording_send(message):
+        await send(message)
+        if message['type'] == 'http.response.start':
+            status.append(str(message['status']))
+        elif message['type'] == 'http.response.body' and not message.get('more_body'):
+            value = query_args(scope).get('input_language', scope.get('input_language'))
+            input_language = main.input_language_label(value, route in CONVERT_PATHS)
+            main.http_requests.inc(route, scope['method'], status[0], input_language)
+            main.http_request_seconds.observe(time.perf_counter() - started, route, input_language)
+
+    return recording_send
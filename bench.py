@@ -0,0 +1,330 @@
+"""Reproducible benchmark suite for the conversion service.
+
+Runs convert() in every mode against the corpora shipped with the repo
+(datasur.txt, surnames.txt, the characters of polyphonic_full.csv) plus
+worst-case heteronym inputs, then drives the HTTP routes through the Flask
+test client. Each scenario reports throughput, p50/p99 latency and peak
+traced memory. Results are written as JSON so runs on different commits can
+be compared:
+
+    python bench.py -o bench-before.json
+    python bench.py -o bench-after.json --compare bench-before.json
+    python bench.py --quick --only convert.chinese
+
+Engine scenarios call _convert() directly and the HTTP scenarios run with
+the result cache disabled, so repeated passes never time cache hits; the
+cache itself has its own scenario. The English
+routes need the external transliteration API and are not benchmarked.
+"""
+import argparse
+import contextlib
+import csv
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+
+import main
+from pypinyin import lazy_pinyin, Style
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Strings built from characters with many readings; the full Cartesian
+# product is far beyond max_variants, so these exercise truncation.
+WORST_CASE_HETERONYMS = [
+    '长行重乐还朝都觉',
+    '长行重乐还朝都觉长行重乐还朝都觉',
+    '和和和和和和和和和和',
+    '着着着着着着着着',
+    '差参单调降率传省',
+]
+
+GEORGIAN_SAMPLE = (
+    'საქართველო არის ქვეყანა ევროპისა და აზიის გასაყარზე. '
+    'თბილისი მისი დედაქალაქია, ქუთაისი კი მეორე დიდი ქალაქი. '
+)
+
+
+# ---------------- Corpora ----------------
+def read_lines(name):
+    with open(os.path.join(BASE_DIR, name), 'r', encoding='utf-8-sig') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def load_corpora():
+    datasur = read_lines('datasur.txt')
+    surnames = [line.split('\t', 1)[0] for line in read_lines('surnames.txt')]
+    with open(os.path.join(BASE_DIR, 'polyphonic_full.csv'), 'r', encoding='utf-8-sig') as f:
+        polyphonic = [row['char_simpl'] for row in csv.DictReader(f) if len(row['char_simpl']) == 1]
+    return {
+        'datasur': datasur,
+        'surnames': surnames,
+        'polyphonic': polyphonic,
+        'pinyin': [' '.join(lazy_pinyin(text, style=Style.NORMAL)) for text in datasur],
+        'heteronyms': WORST_CASE_HETERONYMS,
+        'georgian': [GEORGIAN_SAMPLE * n for n in (1, 4, 16)],
+    }
+
+
+# ---------------- Measurement ----------------
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def measure(fn, inputs, repeat=3):
+    """Time fn over every input (repeat times) and return summary statistics.
+
+    Latency and memory are measured in separate passes because tracemalloc
+    slows allocation-heavy code down considerably.
+    """
+    for item in inputs:
+        fn(item)  # warm-up: lazy dictionaries and lru caches
+
+    latencies = []
+    gc.collect()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for item in inputs:
+            t0 = time.perf_counter()
+            fn(item)
+            latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    for item in inputs:
+        fn(item)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        'calls': len(latencies),
+        'seconds': round(elapsed, 6),
+        'ops_per_sec': round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 4),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 4),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 4),
+        'max_ms': round(latencies[-1] * 1000, 4),
+        'peak_mem_kb': round(peak / 1024, 1),
+    }
+
+
+def measure_concurrent(make_fn, inputs, threads):
+    """Run inputs through `threads` workers, each with its own fn from make_fn()."""
+    latencies = []
+    lock = threading.Lock()
+    shards = [inputs[i::threads] for i in range(threads)]
+
+    def worker(shard):
+        fn = make_fn()
+        local = []
+        for item in shard:
+            t0 = time.perf_counter()
+            fn(item)
+            local.append(time.perf_counter() - t0)
+        with lock:
+            latencies.extend(local)
+
+    workers = [threading.Thread(target=worker, args=(shard,)) for shard in shards]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'calls': len(latencies),
+        'threads': threads,
+        'seconds': round(elapsed, 6),
+        'ops_per_sec': round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 4),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 4),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 4),
+        'max_ms': round(latencies[-1] * 1000, 4),
+    }
+
+
+# ---------------- Scenarios ----------------
+def engine(**options):
+    return lambda text: main._convert(dict(options, text=text))
+
+
+@contextlib.contextmanager
+def result_cache_disabled():
+    """Send every convert() through _convert() for the duration of the block."""
+    cache = main.result_cache
+    saved = cache.maxsize, cache.backend
+    cache.maxsize, cache.backend = 0, None
+    cache.clear()  # in-process entries only; a shared backend is left alone
+    try:
+        yield
+    finally:
+        cache.maxsize, cache.backend = saved
+
+
+def checked_post(client, path, **kwargs):
+    response = client.post(path, **kwargs)
+    if response.status_code != 200:
+        raise RuntimeError(f'{path} returned {response.status_code}: {response.get_data(as_text=True)[:200]}')
+    return response.get_data()
+
+
+def engine_scenarios(corpora, quick):
+    def sample(name, n):
+        return corpora[name][:n] if quick else corpora[name]
+
+    return [
+        ('convert.chinese.datasur', engine(), sample('datasur', 300)),
+        ('convert.chinese.surnames', engine(), sample('surnames', 300)),
+        ('convert.chinese.polyphonic_chars', engine(), sample('polyphonic', 500)),
+        ('convert.chinese.tones', engine(include_tones=True), sample('datasur', 300)),
+        ('convert.chinese.no_case_suffix', engine(show_case_suffix=False), sample('datasur', 300)),
+        ('convert.pinyin', engine(input_language='pinyin'), sample('pinyin', 300)),
+        ('convert.pinyin.tones', engine(input_language='pinyin', include_tones=True), sample('pinyin', 300)),
+        ('convert.heteronyms', engine(), corpora['heteronyms']),
+        ('convert.heteronyms.max_variants_4096', engine(max_variants=4096), corpora['heteronyms']),
+        ('convert.heteronyms.tones', engine(include_tones=True), corpora['heteronyms']),
+        ('convert.georgian.asomtavruli', engine(input_language='georgian', geo_target='asomtavruli'),
+         corpora['georgian']),
+        ('convert.georgian.nuskhuri', engine(input_language='georgian', geo_target='nuskhuri'),
+         corpora['georgian']),
+        ('convert.geo_to_latin', engine(input_language='geo_to_latin'), corpora['georgian']),
+        ('convert.geo_to_latin.no_apostrophes', engine(input_language='geo_to_latin', use_apostrophes=False),
+         corpora['georgian']),
+        ('convert.cached', lambda text: main.convert({'text': text}), sample('datasur', 300)),
+    ]
+
+
+def http_scenarios(corpora, quick):
+    client = main.app.test_client()
+    names = corpora['datasur'][:200] if quick else corpora['datasur']
+    batches = [names[i:i + 50] for i in range(0, len(names), 50)]
+    ndjson = ['\n'.join(batch).encode('utf-8') for batch in batches]
+    georgian = [text.encode('utf-8') for text in corpora['georgian']]
+
+    def incremental(text):
+        # Start a session, then type one more character into it.
+        started = json.loads(checked_post(client, '/convert/incremental', json={'text': text}))
+        return checked_post(client, '/convert/incremental', json={
+            'session': started['session'],
+            'version': started['version'],
+            'delta': {'start': len(text), 'insert': '文'},
+        })
+
+    return [
+        ('http.convert', lambda text: checked_post(client, '/convert', json={'text': text}), names),
+        ('http.convert.tones',
+         lambda text: checked_post(client, '/convert', json={'text': text, 'include_tones': True}), names),
+        ('http.convert.batch', lambda batch: checked_post(client, '/convert/batch', json={'items': batch}), batches),
+        ('http.convert.stream', lambda body: checked_post(client, '/convert/stream', data=body), ndjson),
+        ('http.convert.georgian.stream',
+         lambda body: checked_post(client, '/convert/georgian/stream?target=latin', data=body), georgian),
+        ('http.convert.incremental', incremental, names),
+        ('http.index', lambda _: client.get('/').get_data(), [None] * 50),
+    ]
+
+
+def load_scenario(corpora, quick, threads):
+    names = corpora['datasur'][:400] if quick else corpora['datasur']
+
+    def make_fn():
+        client = main.app.test_client()
+        return lambda text: checked_post(client, '/convert', json={'text': text, 'include_tones': True})
+
+    with result_cache_disabled():
+        return measure_concurrent(make_fn, names, threads)
+
+
+# ---------------- Reporting ----------------
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path, threshold):
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+    regressions = []
+    for name, current in results.items():
+        before = baseline.get(name)
+        if not before or not before.get('p50_ms'):
+            continue
+        ratio = current['p50_ms'] / before['p50_ms']
+        marker = ''
+        if ratio > 1 + threshold:
+            marker = '  REGRESSION'
+            regressions.append(name)
+        print(f'{name:45s} p50 {before["p50_ms"]:10.3f} → {current["p50_ms"]:10.3f} ms  x{ratio:5.2f}{marker}',
+              file=sys.stderr)
+    return regressions
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Benchmark convert() and the HTTP routes.')
+    parser.add_argument('-o', '--output', default='-', help="JSON results file, '-' for stdout (default)")
+    parser.add_argument('--quick', action='store_true', help='use small corpus samples')
+    parser.add_argument('--repeat', type=int, default=3, help='timed passes over each scenario input')
+    parser.add_argument('--threads', type=int, default=8, help='threads for the /convert load run')
+    parser.add_argument('--only', help='run only scenarios whose name starts with this prefix')
+    parser.add_argument('--compare', metavar='BASELINE', help='compare p50 latency against an earlier results file')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='relative p50 slowdown reported as a regression (default 0.10)')
+    return parser
+
+
+def main_cli(argv=None):
+    args = build_parser().parse_args(argv)
+    corpora = load_corpora()
+    scenarios = engine_scenarios(corpora, args.quick) + http_scenarios(corpora, args.quick)
+
+    results = {}
+    for name, fn, inputs in scenarios:
+        if args.only and not name.startswith(args.only):
+            continue
+        if name == 'convert.cached':
+            main.result_cache.clear()
+        with result_cache_disabled() if name.startswith('http.') else contextlib.nullcontext():
+            results[name] = measure(fn, inputs, args.repeat)
+        print(f'{name:45s} {results[name]["ops_per_sec"]:10.1f} ops/s  p50 {results[name]["p50_ms"]:9.3f} ms  '
+              f'p99 {results[name]["p99_ms"]:9.3f} ms', file=sys.stderr)
+    if not args.only or 'http.load.convert'.startswith(args.only):
+        results['http.load.convert'] = load_scenario(corpora, args.quick, args.threads)
+        print(f'{"http.load.convert":45s} {results["http.load.convert"]["ops_per_sec"]:10.1f} ops/s  '
+              f'({args.threads} threads)', file=sys.stderr)
+
+    report = {
+        'revision': git_revision(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'quick': args.quick,
+        'repeat': args.repeat,
+        'results': results,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2) + '\n'
+    if args.output == '-':
+        sys.stdout.write(text)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    if args.compare:
+        return 1 if compare(results, args.compare, args.threshold) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main_cli())
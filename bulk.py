@@ -0,0 +1,133 @@
+"""Command-line bulk conversion.
+
+Reads newline-delimited text or JSONL from a file (or stdin) and writes one
+JSON result per line as soon as it is produced, so memory use does not grow
+with the input size.
+
+    python bulk.py datasur.txt -o datasur_converted.jsonl
+    cat names.jsonl | python bulk.py --format jsonl --include-tones
+    python bulk.py registry.txt -o registry.jsonl --workers 32
+    python bulk.py manuscript.txt -o manuscript-latin.txt --georgian latin
+
+With --workers N the input is cut into chunks that are converted by a pool
+of N processes; output order always matches input order.
+
+With --georgian TARGET the input is treated as a Georgian document and is
+streamed through script conversion (or Latin transliteration) chunk by
+chunk instead of line by line.
+"""
+import argparse
+import collections
+import itertools
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from main import iter_convert_lines, convert, iter_convert_georgian_chunks, iter_file_chunks, GEORGIAN_STREAM_TARGETS
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Stream Chinese/pinyin → Georgian conversion as NDJSON.')
+    parser.add_argument('input', nargs='?', default='-', help="input file, '-' for stdin (default)")
+    parser.add_argument('-o', '--output', default='-', help="output file, '-' for stdout (default)")
+    parser.add_argument('--format', choices=('auto', 'text', 'jsonl'), default='auto',
+                        help='input format; auto treats lines starting with { or " as JSON')
+    parser.add_argument('--include-tones', action='store_true')
+    parser.add_argument('--no-case-suffix', action='store_true', help='do not append -ი to consonant endings')
+    parser.add_argument('--input-language', default='chinese')
+    parser.add_argument('--geo-target')
+    parser.add_argument('--max-variants', type=int)
+    parser.add_argument('--workers', type=int, default=1, help='number of worker processes (default 1)')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='lines per worker task')
+    parser.add_argument('--georgian', choices=GEORGIAN_STREAM_TARGETS,
+                        help='convert a Georgian document to this script instead of emitting NDJSON')
+    parser.add_argument('--no-apostrophes', action='store_true', help='plain Latin mapping for --georgian latin')
+    return parser
+
+
+def options_from_args(args):
+    defaults = {
+        'include_tones': args.include_tones,
+        'show_case_suffix': not args.no_case_suffix,
+        'input_language': args.input_language,
+    }
+    if args.geo_target:
+        defaults['geo_target'] = args.geo_target
+    if args.max_variants is not None:
+        defaults['max_variants'] = args.max_variants
+    return defaults
+
+
+def open_input(path):
+    if path == '-':
+        return sys.stdin
+    return open(path, 'r', encoding='utf-8-sig')
+
+
+def open_output(path):
+    if path == '-':
+        return sys.stdout
+    return open(path, 'w', encoding='utf-8')
+
+
+# ---------------- Worker pool ----------------
+def _init_worker():
+    # Importing main has already loaded the pypinyin dictionaries; one
+    # conversion also warms the lazily built pypinyin phrase structures.
+    convert({'text': '中文'})
+
+
+def _convert_chunk(lines, defaults, input_format):
+    return ''.join(iter_convert_lines(lines, defaults, input_format))
+
+
+def iter_chunks(lines, size):
+    lines = iter(lines)
+    while True:
+        chunk = list(itertools.islice(lines, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_convert_parallel(lines, defaults, input_format='auto', workers=2, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Like iter_convert_lines but spread over a process pool.
+
+    At most 2 * workers chunks are in flight, so memory stays bounded;
+    chunks are yielded in submission order.
+    """
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        pending = collections.deque()
+        for chunk in iter_chunks(lines, chunk_size):
+            pending.append(pool.submit(_convert_chunk, chunk, defaults, input_format))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    defaults = options_from_args(args)
+    infile = open_input(args.input)
+    outfile = open_output(args.output)
+    if args.georgian:
+        output = iter_convert_georgian_chunks(iter_file_chunks(infile), args.georgian, not args.no_apostrophes)
+    elif args.workers > 1:
+        output = iter_convert_parallel(infile, defaults, args.format, args.workers, args.chunk_size)
+    else:
+        output = iter_convert_lines(infile, defaults, args.format)
+    try:
+        for text in output:
+            outfile.write(text)
+    finally:
+        if infile is not sys.stdin:
+            infile.close()
+        if outfile is not sys.stdout:
+            outfile.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
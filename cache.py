@@ -0,0 +1,326 @@
+"""Bounded caches used by the conversion service.
+
+ResultCache is an in-process LRU. It can be given a shared backend so that
+several gunicorn workers see each other's results:
+
+    sqlite:///path/to/cache.db   local file shared by all workers on a host
+    redis://host:6379/0          any Redis-compatible server (needs `redis`)
+
+Backends store JSON-encoded results; a backend failure is logged and treated
+as a miss, never as a request error. Entries expire ttl seconds after they
+were written, and a SQLite table keeps at most max_rows entries (oldest
+dropped first); both can be given in the URL, e.g.
+sqlite:///cache.db?ttl=86400&max_rows=100000. Redis has no row limit here;
+bound its memory with maxmemory and an eviction policy.
+
+TTLCache and SingleFlight front the English transliteration upstream:
+responses expire after a fixed time, and concurrent requests for the same
+key share one upstream call (AsyncSingleFlight does the same inside an
+asyncio event loop).
+"""
+import asyncio
+import json
+import logging
+import os
+import itertools
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qsl, urlencode
+
+logger = logging.getLogger(__name__)
+
+
+class SqliteBackend:
+    # Expired and surplus rows are deleted once every PRUNE_EVERY writes
+    PRUNE_EVERY = 256
+
+    def __init__(self, path, table='results', ttl=None, max_rows=None):
+        self.path = path
+        self.table = table
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self._local = threading.local()
+        self._writes = itertools.count()
+        conn = self._connection()
+        conn.execute(
+            f'CREATE TABLE IF NOT EXISTS {table} '
+            '(key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL DEFAULT 0)'
+        )
+        if 'stored_at' not in {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}:
+            # Tables created before expiry existed
+            conn.execute(f'ALTER TABLE {table} ADD COLUMN stored_at REAL NOT NULL DEFAULT 0')
+        conn.execute(f'CREATE INDEX IF NOT EXISTS {table}_stored_at ON {table} (stored_at)')
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        # SQLite connections must not cross fork(), e.g. gunicorn preload_app
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=1, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key):
+        oldest = time.time() - self.ttl if self.ttl else 0
+        row = self._connection().execute(
+            f'SELECT value FROM {self.table} WHERE key = ? AND stored_at >= ?', (key, oldest)
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value):
+        self._connection().execute(
+            f'INSERT OR REPLACE INTO {self.table} (key, value, stored_at) VALUES (?, ?, ?)', (key, value, time.time())
+        )
+        if next(self._writes) % self.PRUNE_EVERY == 0:
+            self.prune()
+
+    def prune(self):
+        """Delete expired rows, then the oldest rows beyond max_rows."""
+        conn = self._connection()
+        if self.ttl:
+            conn.execute(f'DELETE FROM {self.table} WHERE stored_at < ?', (time.time() - self.ttl,))
+        if self.max_rows:
+            conn.execute(
+                f'DELETE FROM {self.table} WHERE key IN '
+                f'(SELECT key FROM {self.table} ORDER BY stored_at DESC LIMIT -1 OFFSET ?)', (self.max_rows,)
+            )
+
+    def clear(self):
+        self._connection().execute(f'DELETE FROM {self.table}')
+
+
+class RedisBackend:
+    def __init__(self, url, prefix='convert:', ttl=None):
+        import redis  # optional dependency, only needed for this backend
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return value.decode('utf-8') if value is not None else None
+
+    def set(self, key, value):
+        self.client.set(self.prefix + key, value, ex=self.ttl)
+
+    def clear(self):
+        for key in self.client.scan_iter(self.prefix + '*'):
+            self.client.delete(key)
+
+
+def backend_from_url(url, namespace=None, ttl=None, max_rows=None):
+    """Build a shared backend from a URL, or return None for an empty URL.
+
+    namespace keeps a second user of the same URL (a SQLite table, a Redis
+    key prefix) apart from the conversion results. ttl and max_rows are
+    defaults that ttl= and max_rows= query parameters in the URL override;
+    0 disables either.
+    """
+    if not url:
+        return None
+    url, _, query_string = url.partition('?')
+    query = dict(parse_qsl(query_string))
+    ttl = float(query.pop('ttl', ttl) or 0)
+    max_rows = int(query.pop('max_rows', max_rows) or 0)
+    if query:
+        url = f'{url}?{urlencode(query)}'
+    if url.startswith('sqlite:///'):
+        return SqliteBackend(url[len('sqlite:///'):], table=namespace or 'results', ttl=ttl, max_rows=max_rows)
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisBackend(url, prefix=f'{namespace or "convert"}:', ttl=max(1, int(ttl)) if ttl else None)
+    raise ValueError(f'Unsupported cache backend: {url}')
+
+
+class ResultCache:
+    """Thread-safe LRU of JSON-serializable results with hit/miss counters.
+
+    Cached values are shared between callers and must be treated as
+    read-only.
+    """
+
+    def __init__(self, maxsize=1024, backend=None):
+        self.maxsize = maxsize
+        self.backend = backend
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.shared_hits = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+        if self.backend is not None:
+            try:
+                raw = self.backend.get(json.dumps(key, ensure_ascii=False))
+            except Exception as e:
+                logger.warning(f'Cache backend get failed: {e}')
+                raw = None
+            if raw is not None:
+                value = json.loads(raw)
+                self._store(key, value)
+                with self._lock:
+                    self.shared_hits += 1
+                return value
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, value):
+        self._store(key, value)
+        if self.backend is not None:
+            try:
+                self.backend.set(json.dumps(key, ensure_ascii=False), json.dumps(value, ensure_ascii=False))
+            except Exception as e:
+                logger.warning(f'Cache backend set failed: {e}')
+
+    def _store(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.shared_hits = 0
+        if self.backend is not None:
+            self.backend.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'hit_ratio': (self.hits + self.shared_hits) / lookups if lookups else 0.0,
+                'backend': type(self.backend).__name__ if self.backend is not None else None,
+            }
+
+
+class TTLCache:
+    """Thread-safe LRU whose entries also expire ttl seconds after insertion."""
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                expires, value = item
+                if expires > now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+            }
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one execution.
+
+    The first caller for a key runs fn; callers arriving while it runs wait
+    for, and share, its result or exception.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def do(self, key, fn, timeout=None):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+        if not leader:
+            if not call.done.wait(timeout):
+                raise TimeoutError(f'Timed out waiting for in-flight call {key!r}')
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class AsyncSingleFlight:
+    """asyncio counterpart of SingleFlight for use inside one event loop."""
+
+    def __init__(self):
+        self._calls = {}
+        self.coalesced = 0
+
+    async def do(self, key, fn):
+        future = self._calls.get(key)
+        if future is not None:
+            self.coalesced += 1
+            # shield so one waiter's cancellation does not cancel the shared call
+            return await asyncio.shield(future)
+        future = asyncio.ensure_future(fn())
+        self._calls[key] = future
+        future.add_done_callback(lambda _: self._calls.pop(key, None))
+        return await asyncio.shield(future)
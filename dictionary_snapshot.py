@@ -0,0 +1,86 @@
+"""Prebuilt snapshot of the tables main.py otherwise derives at import.
+
+Building the syllable→Georgian table walks every reading in pypinyin's
+dictionary, and ktghz2013.load() retrains pypinyin's phrase segmenter on
+phrases that have not changed. The snapshot stores the results instead:
+
+    pinyin_dict       PINYIN_DICT after the ktghz2013 readings are merged in
+    syllable_table    GEORGIAN_SYLLABLE_TABLE
+    special_cases     the special-case index, with the path and mtime it was
+                      built from
+
+The file is a marshal dump behind a small header and is read through mmap.
+It is only used when its signature matches the running code: the Python
+version (marshal's format may change between releases), the pypinyin and
+pypinyin-dict versions and a hash of main.py. With a stale or missing
+snapshot main.py rebuilds the tables in memory; it never writes the file.
+
+Build it during deployment, after installing requirements:
+
+    python -m dictionary_snapshot [dictionary_snapshot.bin]
+"""
+import hashlib
+import logging
+import marshal
+import mmap
+import os
+import struct
+import sys
+from importlib import metadata
+
+MAGIC = b'DSNP'
+VERSION = 1
+HEADER = struct.Struct('<4sI')
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SNAPSHOT_PATH = os.path.join(BASE_DIR, 'dictionary_snapshot.bin')
+
+logger = logging.getLogger(__name__)
+
+
+def snapshot_signature(source_path):
+    """Everything the snapshotted tables depend on, as a hashable tuple."""
+    with open(source_path, 'rb') as f:
+        source_hash = hashlib.sha1(f.read()).hexdigest()
+    return (
+        VERSION,
+        tuple(sys.version_info[:2]),
+        metadata.version('pypinyin'),
+        metadata.version('pypinyin-dict'),
+        source_hash,
+    )
+
+
+def write_snapshot(tables, signature, path=DEFAULT_SNAPSHOT_PATH):
+    """Write tables atomically; values must be marshal-able builtins."""
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION))
+        f.write(marshal.dumps((signature, tables)))
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_snapshot(signature, path=DEFAULT_SNAPSHOT_PATH):
+    """Return the snapshotted tables, or None if missing, stale or unreadable."""
+    try:
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            magic, version = HEADER.unpack_from(mm, 0)
+            if magic != MAGIC or version != VERSION:
+                return None
+            with memoryview(mm)[HEADER.size:] as view:
+                stored_signature, tables = marshal.loads(view)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, EOFError, TypeError, struct.error) as e:
+        logger.warning(f'Ignoring unreadable dictionary snapshot {path}: {e}')
+        return None
+    if stored_signature != signature:
+        return None
+    return tables
+
+
+if __name__ == '__main__':
+    import main
+    built = main.save_dictionary_snapshot(*sys.argv[1:])
+    print(f'Wrote {built} ({len(main.GEORGIAN_SYLLABLE_TABLE)} syllables, {len(main.PINYIN_DICT)} characters)')
@@ -0,0 +1,20 @@
+"""Gunicorn settings.
+
+The app is imported once in the master (preload_app) and workers are forked
+from it, so the pinyin dictionaries, the syllable tables read from
+dictionary_snapshot.bin and the mmap'd polyphonic index are loaded once and
+shared copy-on-write. New workers start without importing anything.
+
+Worker count and bind address come from the usual WEB_CONCURRENCY and PORT
+environment variables, or from the command line.
+"""
+import gc
+
+preload_app = True
+
+
+def pre_fork(server, worker):
+    # Move everything the master loaded out of the collector's generations;
+    # otherwise a worker's first full collection writes to (and so copies)
+    # every page holding those objects.
+    gc.freeze()
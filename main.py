@@ -1,23 +1,66 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context, g
 import pypinyin
 import re
 import itertools
+import functools
 from pypinyin_dict.pinyin_data import ktghz2013
+from pypinyin.constants import PINYIN_DICT, PHRASES_DICT, RE_HANS
+from pypinyin.seg import mmseg
+from pypinyin.seg.simpleseg import simple_seg
 from flask_cors import CORS
 import unicodedata
 import os
+import json
+import codecs
+import csv
+import time
+import threading
+import secrets
+from concurrent.futures import ThreadPoolExecutor, wait
 import requests
 import urllib3
+from cache import ResultCache, TTLCache, SingleFlight, backend_from_url
+from polyphonic_index import load_index as load_polyphonic_index
+from resilience import CircuitBreaker, ConcurrencyLimiter, UpstreamUnavailable
+from metrics import Registry, COUNT_BUCKETS
+from profiling import PROFILE_FORMATS, StackSampler, profile_call
+from dictionary_snapshot import DEFAULT_SNAPSHOT_PATH, read_snapshot, snapshot_signature, write_snapshot
 
 # Disable SSL warnings for requests with verify=False
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
-# Load the pinyin data
-ktghz2013.load()
-
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "*"}})
 
+# ---------------- Dictionary snapshot ----------------
+# Tables derived at import are read from DICTIONARY_SNAPSHOT_PATH when it was
+# built from this exact code and dictionary versions (see dictionary_snapshot.py);
+# otherwise they are rebuilt in memory. Importing never writes the file; build
+# it with `python -m dictionary_snapshot` as a deploy step. An empty path disables it.
+DICTIONARY_SNAPSHOT_PATH = os.environ.get('DICTIONARY_SNAPSHOT_PATH', DEFAULT_SNAPSHOT_PATH)
+
+
+def _read_dictionary_snapshot():
+    if not DICTIONARY_SNAPSHOT_PATH:
+        return None, None
+    try:
+        signature = snapshot_signature(os.path.abspath(__file__))
+    except Exception as e:
+        app.logger.warning(f"Dictionary snapshot disabled: {str(e)}")
+        return None, None
+    return signature, read_snapshot(signature, DICTIONARY_SNAPSHOT_PATH)
+
+
+_snapshot_signature, _dictionary_snapshot = _read_dictionary_snapshot()
+
+# Load the pinyin data
+if _dictionary_snapshot is not None:
+    # The readings ktghz2013.load() would merge in; its phrase segmenter
+    # retrain is skipped since the phrase dictionary is unchanged.
+    PINYIN_DICT.update(_dictionary_snapshot['pinyin_dict'])
+else:
+    ktghz2013.load()
+
 # ---------------- Security headers ----------------
 @app.after_request
 def add_security_headers(response):
@@ -29,13 +72,340 @@ def add_security_headers(response):
     return response
 
 
+# ---------------- Metrics ----------------
+# METRICS_ENABLED=1 turns on /metrics; while off every hook below is a no-op.
+metrics = Registry(enabled=os.environ.get('METRICS_ENABLED', '').lower() in ('1', 'true', 'yes'))
+
+INPUT_LANGUAGES = ('chinese', 'pinyin', 'georgian', 'geo_to_mkhedruli', 'geo_to_asomtavruli',
+                   'geo_to_nuskhuri', 'geo_to_latin')
+CONVERT_ENDPOINTS = ('convert_endpoint', 'convert_batch_endpoint', 'convert_stream_endpoint',
+                     'convert_incremental_endpoint')
+# Their bodies are read as a stream by the view, never parsed as JSON here
+STREAMING_ENDPOINTS = ('convert_stream_endpoint', 'convert_georgian_stream_endpoint')
+
+http_requests = metrics.counter(
+    'http_requests_total', 'HTTP requests by route, method, status and input_language.',
+    ('route', 'method', 'status', 'input_language'))
+http_request_seconds = metrics.histogram(
+    'http_request_duration_seconds', 'Time until the response body is fully sent.',
+    ('route', 'input_language'))
+convert_stage_seconds = metrics.histogram(
+    'convert_stage_duration_seconds', 'Time spent in each stage of _convert().', ('stage',))
+convert_combinations = metrics.histogram(
+    'convert_reading_combinations', 'Size of the full heteronym Cartesian product per conversion.',
+    buckets=COUNT_BUCKETS)
+convert_variants = metrics.histogram(
+    'convert_variants', 'Georgian variants returned per conversion.', buckets=COUNT_BUCKETS)
+upstream_seconds = metrics.histogram(
+    'english_upstream_duration_seconds', 'Latency of calls to the English transliteration API.',
+    ('call', 'outcome'))
+metrics.gauge(
+    'cache_hit_ratio', 'Hit ratio of each cache since start or the last clear.', ('cache',),
+    lambda: {(name,): cache.stats()['hit_ratio'] for name, cache in (
+        ('convert', result_cache), ('suggestions', suggestions_cache), ('transliteration', transliteration_cache))})
+metrics.gauge(
+    'cache_entries', 'Entries currently held by each cache.', ('cache',),
+    lambda: {(name,): cache.stats()['size'] for name, cache in (
+        ('convert', result_cache), ('suggestions', suggestions_cache), ('transliteration', transliteration_cache))})
+metrics.gauge(
+    'special_cases_entries', 'Phrases in the live special-case table.', (),
+    lambda: {(): special_cases_stats()['entries']})
+metrics.gauge(
+    'special_cases_reload_errors_total', 'Special-case files rejected at load or reload.', (),
+    lambda: {(): special_cases_reloads['errors']}, kind='counter')
+metrics.gauge(
+    'special_cases_rejected', '1 while the current special-case file is rejected.', (),
+    lambda: {(): int(special_cases_reloads['rejected_version'] is not None)})
+metrics.gauge(
+    'english_breaker_state', 'Upstream circuit breaker state (1 for the current state).', ('state',),
+    lambda: {(state,): int(upstream_breaker.state == state) for state in ('closed', 'half_open', 'open')})
+metrics.gauge(
+    'english_breaker_rejected_total', 'Upstream calls rejected while the breaker was open.', (),
+    lambda: {(): upstream_breaker.stats()['rejected']}, kind='counter')
+metrics.gauge(
+    'english_breaker_opened_total', 'Times the upstream breaker has opened.', (),
+    lambda: {(): upstream_breaker.stats()['times_opened']}, kind='counter')
+metrics.gauge(
+    'english_upstream_rejected_total', 'Upstream calls refused by the concurrency limit.', (),
+    lambda: {(): upstream_limiter.stats()['rejected']}, kind='counter')
+
+
+def input_language_label(value, is_conversion):
+    """Bound a client-supplied input_language to INPUT_LANGUAGES or 'other'."""
+    if value is None:
+        return 'chinese' if is_conversion else ''
+    return value if value in INPUT_LANGUAGES else 'other'
+
+
+def request_input_language():
+    """input_language label for the current request ('' if it has none)."""
+    value = request.args.get('input_language')
+    is_conversion = request.endpoint in CONVERT_ENDPOINTS
+    if value is None and is_conversion and request.is_json and request.endpoint not in STREAMING_ENDPOINTS:
+        data = request.get_json(silent=True)
+        if isinstance(data, dict):
+            value = data.get('input_language')
+    return input_language_label(value, is_conversion)
+
+
+@app.before_request
+def start_request_timer():
+    if metrics.enabled:
+        g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request_metrics(response):
+    if metrics.enabled and 'request_started' in g:
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        method, status = request.method, str(response.status_code)
+        input_language = request_input_language()
+        started = g.request_started
+
+        def record():
+            # Runs after streamed bodies are sent, so it covers the whole response
+            http_requests.inc(route, method, status, input_language)
+            http_request_seconds.observe(time.perf_counter() - started, route, input_language)
+
+        response.call_on_close(record)
+    return response
+
+
+# ---------------- Profiling ----------------
+# PROFILING_ENABLED=1 lets a /convert request ask for a profile with an
+# X-Profile: cprofile|trace header (or ?profile=); trace records every call
+# and returns collapsed stacks. If PROFILE_TOKEN is set, the X-Profile-Token
+# header must match it. PROFILE_DIR also keeps each profile on disk, and
+# requires PROFILE_TOKEN. PROFILE_SAMPLE_INTERVAL>0 samples all thread stacks
+# in the background; the collapsed stacks are served on /debug/profile/samples.
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', '').lower() in ('1', 'true', 'yes')
+PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN', '')
+PROFILE_DIR = os.environ.get('PROFILE_DIR', '')
+PROFILE_SAMPLE_INTERVAL = float(os.environ.get('PROFILE_SAMPLE_INTERVAL', '0'))
+
+if PROFILE_DIR and not PROFILE_TOKEN:
+    # Anyone could otherwise fill the disk with profiles of their requests
+    raise RuntimeError("PROFILE_DIR is set but PROFILE_TOKEN is not; refusing to start")
+
+stack_sampler = StackSampler(PROFILE_SAMPLE_INTERVAL) if PROFILE_SAMPLE_INTERVAL > 0 else None
+
+
+def check_profile_access(fmt, token):
+    """Return (error, status) if a profile request must be refused, else None.
+
+    fmt=None checks only the token.
+    """
+    if fmt is not None and fmt not in PROFILE_FORMATS:
+        return f"profile must be one of {', '.join(PROFILE_FORMATS)}", 400
+    if PROFILE_TOKEN and not secrets.compare_digest(token or '', PROFILE_TOKEN):
+        return "Invalid or missing X-Profile-Token", 403
+    return None
+
+
+def store_profile(raw, fmt):
+    """Write a profile under PROFILE_DIR and return its path (None if unset)."""
+    if not PROFILE_DIR:
+        return None
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{secrets.token_hex(4)}"
+    path = os.path.join(PROFILE_DIR, name + ('.prof' if fmt == 'cprofile' else '.collapsed'))
+    if fmt == 'cprofile':
+        raw.dump_stats(path)
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(raw)
+    return path
+
+
+def profiled_convert(data, fmt):
+    """Run _convert() under a profiler, bypassing the result cache."""
+    result, text, raw = profile_call(_convert, data, fmt=fmt)
+    return {"result": result, "profile": {"format": fmt, "text": text, "path": store_profile(raw, fmt)}}
+
+
+@app.before_request
+def start_stack_sampler():
+    # Started lazily so each forked worker samples itself
+    if stack_sampler is not None and not stack_sampler.running:
+        stack_sampler.start()
+
+
 # ---------------- Pinyin helpers ----------------
-def get_pinyin(words, include_tones=False):
+# Upper bound on heteronym combinations expanded per request. A handful of
+# polyphonic characters is enough to reach millions of combinations.
+DEFAULT_MAX_VARIANTS = 256
+MAX_VARIANTS_LIMIT = 4096
+# Syllables one expansion may produce in total (variants x positions), so a
+# long input gets fewer variants instead of proportionally more work.
+MAX_EXPANDED_SYLLABLES = int(os.environ.get('MAX_EXPANDED_SYLLABLES', str(DEFAULT_MAX_VARIANTS * 256)))
+# Longer texts (and runs and segments) bypass the in-process caches: they are
+# rarely repeated, and each entry would pin the text and all its readings.
+MAX_CACHED_TEXT_LENGTH = int(os.environ.get('MAX_CACHED_TEXT_LENGTH', '256'))
+
+
+def short_text_cache(maxsize):
+    """functools.lru_cache for calls whose first argument is at most MAX_CACHED_TEXT_LENGTH long."""
+    def decorate(fn):
+        cached = functools.lru_cache(maxsize=maxsize)(fn)
+
+        @functools.wraps(fn)
+        def wrapper(text, *args):
+            if len(text) > MAX_CACHED_TEXT_LENGTH:
+                return fn(text, *args)
+            return cached(text, *args)
+
+        wrapper.cache_info = cached.cache_info
+        wrapper.cache_clear = cached.cache_clear
+        return wrapper
+    return decorate
+
+
+def parse_max_variants(value):
+    """Clamp a client-supplied max_variants to [1, MAX_VARIANTS_LIMIT]."""
+    if value is None:
+        return DEFAULT_MAX_VARIANTS
+    return max(1, min(int(value), MAX_VARIANTS_LIMIT))
+
+
+def variant_budget(readings, max_variants):
+    """max_variants, lowered so the expansion stays within MAX_EXPANDED_SYLLABLES."""
+    if max_variants is None:
+        return None
+    return max(1, min(max_variants, MAX_EXPANDED_SYLLABLES // max(1, len(readings))))
+
+
+def count_reading_combinations(readings):
+    total = 1
+    for options in readings:
+        total *= len(options)
+    return total
+
+
+def iter_ranked_combinations(readings):
+    """Yield one reading per position, most likely combinations first.
+
+    pypinyin lists the most frequent reading of a character first, so a
+    combination's rank is the sum of the reading indices it uses. Ties are
+    broken lexicographically. Each rank is enumerated directly, in that
+    order, as the ways of spreading the rank over the multi-reading
+    positions, so memory stays O(len(readings)) however many are taken.
+    """
+    if any(not options for options in readings):
+        return
+    multi = [pos for pos, options in enumerate(readings) if len(options) > 1]
+    limits = [len(readings[pos]) - 1 for pos in multi]
+    # capacity[k]: the largest rank positions multi[k:] can absorb
+    capacity = [0] * (len(multi) + 1)
+    for k in range(len(multi) - 1, -1, -1):
+        capacity[k] = capacity[k + 1] + limits[k]
+    combination = [options[0] for options in readings]
+    indices = [0] * len(multi)
+
+    def fill(start, remaining):
+        # Lexicographically smallest spread of remaining over multi[start:]
+        for k in range(start, len(multi)):
+            indices[k] = max(0, remaining - capacity[k + 1])
+            remaining -= indices[k]
+
+    for rank in range(capacity[0] + 1):
+        fill(0, rank)
+        while True:
+            for k, pos in enumerate(multi):
+                combination[pos] = readings[pos][indices[k]]
+            yield tuple(combination)
+            # Next spread: bump the rightmost position that still has rank to
+            # its right to take from, and refill the rest as low as possible
+            suffix = indices[-1] if multi else 0
+            for k in range(len(multi) - 2, -1, -1):
+                if indices[k] < limits[k] and suffix > 0:
+                    indices[k] += 1
+                    fill(k + 1, suffix - 1)
+                    break
+                suffix += indices[k]
+            else:
+                break
+
+
+def iter_reading_combinations(readings, max_variants=None):
+    """Lazily pick one reading per position, at most max_variants times.
+
+    When the full Cartesian product fits in max_variants the historical
+    itertools.product order is kept; otherwise combinations are produced
+    best-first so truncation drops the least likely readings. Positions may
+    hold any values (strings or syllable ids).
+    """
+    max_variants = variant_budget(readings, max_variants)
+    if max_variants is None or count_reading_combinations(readings) <= max_variants:
+        return itertools.product(*readings)
+    return itertools.islice(iter_ranked_combinations(readings), max_variants)
+
+
+def iter_pinyin_variants(readings, max_variants=None):
+    """Lazily expand per-character readings into space-joined variants."""
+    for items in iter_reading_combinations(readings, max_variants):
+        yield ' '.join(items)
+
+
+@short_text_cache(maxsize=8192)
+def lookup_pinyin(text, style, heteronym):
+    """Cached pypinyin.pinyin, keyed on the whole text.
+
+    Only a repeat of the same text hits; readings are shared between
+    different texts per segment, through segment_readings().
+    """
+    return tuple(tuple(options) for options in pypinyin.pinyin(text, style=style, heteronym=heteronym))
+
+
+@short_text_cache(maxsize=65536)
+def segment_readings(word):
+    """Heteronym readings of one pypinyin segment as (TONE, NORMAL) tuples.
+
+    pypinyin converts text segment by segment (single characters, known
+    phrases, non-Chinese runs), so caching per segment gives exactly the
+    readings a whole-text call would, while every character or phrase is
+    resolved only once per process whatever text it appears in.
+    """
+    # A one-element list skips re-segmentation of an already segmented word
+    tone = pypinyin.pinyin([word], style=pypinyin.Style.TONE, heteronym=True)
+    normal = pypinyin.pinyin([word], style=pypinyin.Style.NORMAL, heteronym=True)
+    return tuple(tuple(o) for o in tone), tuple(tuple(o) for o in normal)
+
+
+@short_text_cache(maxsize=4096)
+def segment_run(run):
+    """pypinyin's phrase segmentation of one Chinese or non-Chinese run.
+
+    pypinyin first splits text into such runs and segments each on its own,
+    so texts that share a run (a repeated name, an edited sentence) share
+    its segmentation.
+    """
+    if not RE_HANS.match(run) or not PHRASES_DICT:
+        return (run,)
+    return tuple(mmseg.seg.cut(run))
+
+
+def text_readings(text, include_tones=False):
+    """Per-position heteronym readings of text, built from segment_readings."""
+    readings = []
+    for word in itertools.chain.from_iterable(map(segment_run, simple_seg(text))):
+        tone, normal = segment_readings(word)
+        readings.extend(tone if include_tones else normal)
+    return readings
+
+
+def has_umlaut_reading(text):
+    """True if any toned reading of any position of text contains ü."""
+    return any(
+        'ü' in remove_pinyin_tone_marks(reading)
+        for options in text_readings(text, include_tones=True)
+        for reading in options
+    )
+
+
+def get_pinyin(words, include_tones=False, max_variants=DEFAULT_MAX_VARIANTS):
     style = pypinyin.Style.TONE if include_tones else pypinyin.Style.NORMAL
     pinyin_result = pypinyin.pinyin(words, style=style, heteronym=True)
-    result_tuples = list(itertools.product(*pinyin_result))
-    all_result = [' '.join(items) for items in result_tuples]
-    return all_result
+    return list(iter_pinyin_variants(pinyin_result, max_variants))
 
 
 def normalize_pinyin_v_to_u(pinyin_variants):
@@ -72,79 +442,113 @@ def remove_pinyin_tone_marks(pinyin_text):
     return unicodedata.normalize('NFC', stripped)
 
 
+# ---------------- Pinyin → Georgian rules ----------------
+# long replacements first
+GEORGIAN_REPLACEMENTS_LONG = {
+    'ci': 'ც',
+    'si': 'ს',
+    'zh': 'ჭ',
+    'ch': 'ჩ',
+    'sh': 'შ',
+    'er': 'ერ',
+    'yi': 'i',
+    'wu': 'u',
+    'yu': 'iu',
+    'ya': 'ia',
+    'iu': 'iou',
+    'ng': 'ნგ',
+    'ong': 'უნგ',
+    'ui': 'uei'
+}
+
+GEORGIAN_REPLACEMENTS_SHORT = {
+    'b': 'პ',
+    'p': 'ფ',
+    'm': 'მ',
+    'f': 'ფ',
+    'd': 'ტ',
+    't': 'თ',
+    'n': 'ნ',
+    'l': 'ლ',
+    'g': 'კ',
+    'k': 'ქ',
+    'h': 'ხ',
+    'j': 'ძ',
+    'q': 'ც',
+    'x': 'ს',
+    'z': 'წ',
+    'c': 'ც',
+    's': 'ს',
+    'r': 'ჟ',
+    'y': 'ი',
+    'w': 'ვ',
+    'a': 'ა',
+    'o': 'ო',
+    'e': 'ე',
+    'i': 'ი',
+    'u': 'უ',
+    'ü': 'იუ',
+    'ǖ': 'იუ',  # ü with macron (1st tone)
+    'ǘ': 'იუ',  # ü with acute (2nd tone) 
+    'ǚ': 'იუ',  # ü with caron (3rd tone)
+    'ǜ': 'იუ'   # ü with grave (4th tone)
+}
+
+_GEORGIAN_LONG_RE = re.compile('|'.join(re.escape(char) for char in GEORGIAN_REPLACEMENTS_LONG.keys()))
+_GEORGIAN_SHORT_RE = re.compile('|'.join(re.escape(char) for char in GEORGIAN_REPLACEMENTS_SHORT.keys()))
+_GEORGIAN_IU_RE = re.compile(r'(?<=[jqxy])u')
+
+
+def _apply_georgian_rules(pinyin):
+    """Run the rule engine on a single pinyin string (spaces are dropped)."""
+    text_long = _GEORGIAN_LONG_RE.sub(lambda match: GEORGIAN_REPLACEMENTS_LONG[match.group()], pinyin)
+
+    text_long = _GEORGIAN_IU_RE.sub('iu', text_long)
+    if 'iuan' in text_long and 'g' not in text_long[text_long.index('iuan')+3:]:
+        text_long = text_long.replace('iuan', 'iuen')
+    if 'ian' in text_long:
+        text_long = text_long.replace('ian', 'ien')
+
+    text_short = _GEORGIAN_SHORT_RE.sub(lambda match: GEORGIAN_REPLACEMENTS_SHORT[match.group()], text_long)
+    return text_short.replace(' ', '')
+
+
 def get_georgian(pinyin_list):
     if not pinyin_list:
         return {}
 
     all_result = {}
     for pinyin in pinyin_list:
-        # long replacements first
-        replacements_long = {
-            'ci': 'ც',
-            'si': 'ს',
-            'zh': 'ჭ',
-            'ch': 'ჩ',
-            'sh': 'შ',
-            'er': 'ერ',
-            'yi': 'i',
-            'wu': 'u',
-            'yu': 'iu',
-            'ya': 'ia',
-            'iu': 'iou',
-            'ng': 'ნგ',
-            'ong': 'უნგ',
-            'ui': 'uei'
-        }
-        pattern = '|'.join(re.escape(char) for char in replacements_long.keys())
-        text_long = re.sub(pattern, lambda match: replacements_long[match.group()], pinyin)
-
-        text_long = re.sub(r'(?<=[jqxy])u', 'iu', text_long)
-        if 'iuan' in text_long and 'g' not in text_long[text_long.index('iuan')+3:]:
-            text_long = text_long.replace('iuan', 'iuen')
-        if 'ian' in text_long:
-            text_long = text_long.replace('ian', 'ien')
-
-        replacements_short = {
-            'b': 'პ',
-            'p': 'ფ',
-            'm': 'მ',
-            'f': 'ფ',
-            'd': 'ტ',
-            't': 'თ',
-            'n': 'ნ',
-            'l': 'ლ',
-            'g': 'კ',
-            'k': 'ქ',
-            'h': 'ხ',
-            'j': 'ძ',
-            'q': 'ც',
-            'x': 'ს',
-            'z': 'წ',
-            'c': 'ც',
-            's': 'ს',
-            'r': 'ჟ',
-            'y': 'ი',
-            'w': 'ვ',
-            'a': 'ა',
-            'o': 'ო',
-            'e': 'ე',
-            'i': 'ი',
-            'u': 'უ',
-            'ü': 'იუ',
-            'ǖ': 'იუ',  # ü with macron (1st tone)
-            'ǘ': 'იუ',  # ü with acute (2nd tone) 
-            'ǚ': 'იუ',  # ü with caron (3rd tone)
-            'ǜ': 'იუ'   # ü with grave (4th tone)
-        }
-        pattern_short = '|'.join(re.escape(char) for char in replacements_short.keys())
-        text_short = re.sub(pattern_short, lambda match: replacements_short[match.group()], text_long)
+        all_result[pinyin.replace(' ', '')] = _apply_georgian_rules(pinyin)
 
-        text_short = text_short.replace(' ', '')
-        pinyin_clean = pinyin.replace(' ', '')
+    return all_result
 
-        all_result[pinyin_clean] = text_short
 
-    return all_result
+def _build_georgian_syllable_table():
+    """Precompute Georgian for every toneless syllable known to pypinyin.
+
+    Keys match what map_pinyin_to_georgian looks up: lowercase, tone marks
+    removed, 'v' already written as 'ü'.
+    """
+    syllables = set()
+    for readings in PINYIN_DICT.values():
+        for reading in readings.split(','):
+            syllables.add(remove_pinyin_tone_marks(reading).lower().replace('v', 'ü'))
+    return {s: _apply_georgian_rules(s) for s in syllables if s}
+
+
+if _dictionary_snapshot is not None:
+    GEORGIAN_SYLLABLE_TABLE = _dictionary_snapshot['syllable_table']
+else:
+    GEORGIAN_SYLLABLE_TABLE = _build_georgian_syllable_table()
+
+
+def syllable_to_georgian(syllable):
+    """Georgian for one toneless syllable; table lookup with rule fallback."""
+    georgian = GEORGIAN_SYLLABLE_TABLE.get(syllable)
+    if georgian is None:
+        georgian = _apply_georgian_rules(syllable)
+    return georgian
 
 
 def map_pinyin_to_georgian(pinyin_str):
@@ -154,7 +558,7 @@ def map_pinyin_to_georgian(pinyin_str):
     plain_syllables = [s.lower() for s in plain_syllables]
     # Treat 'v' as 'ü' for Georgian mapping in all modes (e.g., lv → lü)
     plain_syllables = [s.replace('v', 'ü') for s in plain_syllables]
-    georgian_syllables = [get_georgian([s]).get(s, '') for s in plain_syllables]
+    georgian_syllables = [syllable_to_georgian(s) for s in plain_syllables]
     return ' '.join(georgian_syllables).strip()
 
 
@@ -219,15 +623,34 @@ def group_by_base_with_order(pinyin_list):
     return grouped, base_order
 
 
-def get_professional_pinyin(text, include_tones=False):
+def bounded_readings(text, include_tones=False, max_variants=DEFAULT_MAX_VARIANTS):
+    """Return (readings, truncated) ready for a max_variants-bounded expansion."""
+    pinyin_result = text_readings(text, include_tones)
+    max_variants = variant_budget(pinyin_result, max_variants)
+    truncated = max_variants is not None and count_reading_combinations(pinyin_result) > max_variants
+    if truncated:
+        # Only the best-first path depends on reading order, so untruncated
+        # results keep pypinyin's order.
+        pinyin_result = rank_readings(text, pinyin_result)
+    return pinyin_result, truncated
+
+
+def iter_professional_pinyin(text, include_tones=False, max_variants=DEFAULT_MAX_VARIANTS):
+    """Return (iterator, truncated); the iterator lazily yields v→u normalized variants."""
+    pinyin_result, truncated = bounded_readings(text, include_tones, max_variants)
+    variants = (v.replace('v', 'u') for v in iter_pinyin_variants(pinyin_result, max_variants))
+    return variants, truncated
+
+
+def get_professional_pinyin_bounded(text, include_tones=False, max_variants=DEFAULT_MAX_VARIANTS):
+    """Return (variants, truncated) with at most max_variants heteronym variants."""
+    variants, truncated = iter_professional_pinyin(text, include_tones, max_variants)
+    return list(variants), truncated
+
+
+def get_professional_pinyin(text, include_tones=False, max_variants=DEFAULT_MAX_VARIANTS):
     """Get professional pinyin with heteronym support."""
-    style = pypinyin.Style.TONE if include_tones else pypinyin.Style.NORMAL
-    pinyin_result = pypinyin.pinyin(text, style=style, heteronym=True)
-    result_tuples = list(itertools.product(*pinyin_result))
-    all_result = [' '.join(items) for items in result_tuples]
-    # Apply v->ü normalization
-    all_result = normalize_pinyin_v_to_u(all_result)
-    return all_result
+    return get_professional_pinyin_bounded(text, include_tones, max_variants)[0]
 
 
 # ---------------- Pinyin variant helpers ----------------
@@ -251,6 +674,118 @@ def split_last_two_letters_variant(pinyin_str: str) -> str | None:
     return ' '.join(alt)
 
 
+_UMLAUT_U_RE = re.compile(r'(?<!ი)უ')
+
+
+def no_tone_variant_pipeline(variants, split_alternates=False, umlaut=False, show_case_suffix=True):
+    """Turn toneless variants into (pinyin_variants, georgian_variants) in one pass.
+
+    Each variant is tone-stripped, deduplicated and mapped to Georgian as it
+    arrives, so variants can come straight from the lazy Cartesian expansion.
+    With split_alternates (pinyin input) the split-last-two-letters forms are
+    appended after all variants, and the split forms of every resulting
+    pinyin variant are mapped to Georgian only, matching the historical
+    multi-pass order. umlaut renders standalone 'უ' as 'იუ'.
+    """
+    pinyin_variants = {}
+    georgian_variants = {}
+
+    def add_georgian(plain):
+        georgian = map_pinyin_to_georgian(plain)
+        if umlaut and georgian:
+            # Replace standalone 'უ' with 'იუ', but don't double-convert existing 'იუ'
+            georgian = _UMLAUT_U_RE.sub('იუ', georgian)
+        if show_case_suffix:
+            georgian = ensure_georgian_vowel_end(georgian)
+        georgian_variants.setdefault(georgian)
+
+    def add(plain):
+        if plain not in pinyin_variants:
+            pinyin_variants[plain] = None
+            add_georgian(plain)
+
+    alternates = []
+    for v in variants:
+        plain = remove_pinyin_tone_marks(v)
+        add(plain)
+        if split_alternates:
+            alt = split_last_two_letters_variant(plain)
+            if alt and alt != v:
+                alternates.append(alt)
+    for alt in alternates:
+        add(remove_pinyin_tone_marks(alt))
+    if split_alternates:
+        for plain in list(pinyin_variants):
+            alt = split_last_two_letters_variant(plain)
+            if alt and alt != plain and alt not in pinyin_variants:
+                add_georgian(alt)
+    return list(pinyin_variants), list(georgian_variants)
+
+
+# ---------------- Syllable-id variant expansion ----------------
+# Each distinct toneless reading gets a small integer id. Variants are then
+# tuples of ids: tone stripping, v→u and Georgian mapping are done once per
+# reading and become list lookups, and dedup compares int tuples. Only real
+# syllables (keys of GEORGIAN_SYLLABLE_TABLE) are interned, so the tables stay
+# bounded whatever text clients send.
+_reading_ids = {}
+_syllable_lock = threading.Lock()
+SYLLABLE_PLAIN = []
+SYLLABLE_GEORGIAN = []
+
+
+def syllable_id(reading):
+    """Id of a (toneless or toned) NORMAL-style reading, or None if it is not a syllable."""
+    sid = _reading_ids.get(reading)
+    if sid is None:
+        if remove_pinyin_tone_marks(reading).lower().replace('v', 'ü') not in GEORGIAN_SYLLABLE_TABLE:
+            return None
+        plain = remove_pinyin_tone_marks(reading.replace('v', 'u'))
+        # Equal plain forms must share one id, so new ids are assigned under a lock.
+        with _syllable_lock:
+            sid = _reading_ids.get(plain)
+            if sid is None:
+                sid = len(SYLLABLE_PLAIN)
+                SYLLABLE_GEORGIAN.append(map_pinyin_to_georgian(plain))
+                SYLLABLE_PLAIN.append(plain)
+                _reading_ids[plain] = sid
+            _reading_ids[reading] = sid
+    return sid
+
+
+def no_tone_id_pipeline(readings, max_variants=DEFAULT_MAX_VARIANTS, umlaut=False, show_case_suffix=True):
+    """Id-based equivalent of no_tone_variant_pipeline for Chinese input.
+
+    Returns None when some reading is not a known syllable (e.g. a Latin or
+    digit run), and the caller falls back to the string pipeline. Every
+    position is then one syllable, so two id tuples are equal exactly when
+    their joined pinyin strings are.
+    """
+    id_readings = []
+    for options in readings:
+        ids = tuple(syllable_id(r) for r in options)
+        if None in ids:
+            return None
+        id_readings.append(ids)
+    plain, georgian_table = SYLLABLE_PLAIN, SYLLABLE_GEORGIAN
+    seen = set()
+    pinyin_variants = []
+    georgian_variants = {}
+    for ids in iter_reading_combinations(id_readings, max_variants):
+        if ids in seen:
+            continue
+        seen.add(ids)
+        pinyin_variants.append(' '.join([plain[i] for i in ids]))
+        georgian = ' '.join([georgian_table[i] for i in ids if georgian_table[i]])
+        if umlaut and georgian:
+            # Replace standalone 'უ' with 'იუ', but don't double-convert existing 'იუ'
+            georgian = _UMLAUT_U_RE.sub('იუ', georgian)
+        if show_case_suffix:
+            georgian = ensure_georgian_vowel_end(georgian)
+        georgian_variants.setdefault(georgian)
+    return pinyin_variants, list(georgian_variants)
+
+
 # ---------------- Georgian script conversion ----------------
 GEORGIAN_MKHEDRULI_START = 0x10D0  # ა
 GEORGIAN_ASOMTAVRULI_START = 0x10A0  # Ⴀ
@@ -292,6 +827,30 @@ def convert_georgian_char(ch: str, target: str) -> str:
         return chr(GEORGIAN_NUSKHURI_START + idx)
     return ch
 
+GEORGIAN_SCRIPT_STARTS = {
+    'mkhedruli': GEORGIAN_MKHEDRULI_START,
+    'asomtavruli': GEORGIAN_ASOMTAVRULI_START,
+    'nuskhuri': GEORGIAN_NUSKHURI_START,
+}
+
+# str.translate tables equivalent to convert_georgian_char for each target
+GEORGIAN_SCRIPT_TABLES = {
+    target: {
+        source_start + idx: chr(target_start + idx)
+        for source_start in GEORGIAN_SCRIPT_STARTS.values()
+        for idx in range(0x30)
+        if source_start + idx != target_start + idx
+    }
+    for target, target_start in GEORGIAN_SCRIPT_STARTS.items()
+}
+
+
+def convert_georgian_text(text: str, target: str) -> str:
+    """Convert every Georgian letter in text to the target script in one pass."""
+    table = GEORGIAN_SCRIPT_TABLES.get(target)
+    return text.translate(table) if table is not None else text
+
+
 def detect_georgian_script(text: str) -> str | None:
     for ch in text:
         if is_mkhedruli(ch):
@@ -307,8 +866,7 @@ def convert_georgian_scripts(text: str):
     targets = [t for t in ['mkhedruli','asomtavruli','nuskhuri'] if t != source]
     result = {}
     for t in targets:
-        converted = ''.join(convert_georgian_char(ch, t) for ch in text)
-        result[f'to_{t}'] = converted
+        result[f'to_{t}'] = convert_georgian_text(text, t)
     result['source'] = source
     return result
 
@@ -336,13 +894,28 @@ GEORGIAN_TO_LATIN_MAP_STANDARD = {
     'ჹ': 'ĝ', 'ჺ': 'ʕ', 'ჼ': 'n', 'ჾ': 'y', 'ჿ': 'w',
 }
 
+def _build_latin_table(mapping):
+    # Any script → Mkhedruli → Latin, folded into one translate table
+    table = {}
+    for source_start in GEORGIAN_SCRIPT_STARTS.values():
+        for idx in range(0x30):
+            mkh = chr(GEORGIAN_MKHEDRULI_START + idx)
+            latin = mapping.get(mkh, mkh)
+            if latin != chr(source_start + idx):
+                table[source_start + idx] = latin
+    return table
+
+
+GEORGIAN_TO_LATIN_TABLE_TRADITIONAL = _build_latin_table(GEORGIAN_TO_LATIN_MAP_TRADITIONAL)
+GEORGIAN_TO_LATIN_TABLE_STANDARD = _build_latin_table(GEORGIAN_TO_LATIN_MAP_STANDARD)
+
+
 def normalize_to_mkhedruli(text: str) -> str:
-    return ''.join(convert_georgian_char(ch, 'mkhedruli') for ch in text)
+    return convert_georgian_text(text, 'mkhedruli')
 
 def transliterate_georgian_to_latin(text: str, use_apostrophes: bool = True) -> str:
-    mkh = normalize_to_mkhedruli(text)
-    mapping = GEORGIAN_TO_LATIN_MAP_TRADITIONAL if use_apostrophes else GEORGIAN_TO_LATIN_MAP_STANDARD
-    return ''.join(mapping.get(ch, ch) for ch in mkh)
+    table = GEORGIAN_TO_LATIN_TABLE_TRADITIONAL if use_apostrophes else GEORGIAN_TO_LATIN_TABLE_STANDARD
+    return text.translate(table)
 
 
 # ---------------- Polyphonic data loading ----------------
@@ -364,44 +937,451 @@ def contains_cjk(text: str) -> bool:
     return False
 
 
+# Built by `python -m polyphonic_index build` (see Procfile); without it
+# truncated expansions are simply not ranked.
+try:
+    POLYPHONIC_INDEX = load_polyphonic_index()
+except Exception as e:
+    app.logger.error(f"Failed to load polyphonic index: {str(e)}")
+    POLYPHONIC_INDEX = None
+
+
+def reading_characters(text):
+    """The character behind each position of text_readings(text).
+
+    A Chinese segment has one position per character; any other run is a
+    single position, given as None.
+    """
+    chars = []
+    for word in itertools.chain.from_iterable(map(segment_run, simple_seg(text))):
+        positions = len(segment_readings(word)[0])
+        if RE_HANS.match(word) and positions == len(word):
+            chars.extend(word)
+        else:
+            chars.extend([None] * positions)
+    return chars
+
+
 def lookup_polyphonic_readings(text):
-    """Deprecated: polyphonic_full CSV removed. Always return None."""
-    return None
+    """Toned readings from polyphonic_full.csv for each text_readings() position.
+
+    Returns a list aligned with those positions, most common reading first
+    (None where the CSV has no entry or the position is not a Chinese
+    character), or None when the index is unavailable.
+    """
+    if POLYPHONIC_INDEX is None:
+        return None
+    return [POLYPHONIC_INDEX.readings(ch) if ch else None for ch in reading_characters(text)]
+
+
+def _reading_key(reading):
+    # Compare readings independent of tone style and of 'v' vs 'ü'
+    return remove_pinyin_tone_marks(reading).lower().replace('ü', 'v')
+
+
+def rank_readings(text, readings):
+    """Reorder and trim heteronym readings using the polyphonic index.
+
+    pypinyin's first reading for each position (which already reflects
+    phrase context) stays first, so the primary variant is the same whether
+    or not the expansion is truncated. For each character the CSV covers,
+    the remaining readings it attests follow in the CSV's frequency order
+    and unattested ones are dropped. Other positions are returned unchanged.
+
+    Only truncated expansions are ranked: untruncated results keep
+    pypinyin's full reading list and order, as they always have.
+    """
+    known = lookup_polyphonic_readings(text)
+    if not known or len(known) != len(readings):
+        return readings
+    ranked = []
+    for options, csv_readings in zip(readings, known):
+        if not csv_readings or len(options) < 2:
+            ranked.append(options)
+            continue
+        order = {}
+        for i, reading in enumerate(csv_readings):
+            order.setdefault(_reading_key(reading), i)
+        first, rest = options[0], options[1:]
+        attested = sorted((o for o in rest if _reading_key(o) in order), key=lambda o: order[_reading_key(o)])
+        ranked.append((first,) + tuple(attested))
+    return ranked
+
+
+# ---------------- Special cases ----------------
+# Established Georgian names that override transliteration. The table lives in
+# a CSV (hanzi,georgian) or JSON ({hanzi: georgian}) file and is reloaded when
+# its mtime changes: a background thread checks it every
+# SPECIAL_CASES_RELOAD_INTERVAL seconds (negative disables reloading).
+# Update it only by writing a complete new file and renaming it over the old
+# one (mv, os.replace): a file edited in place can be read half-written. As a
+# backstop, a file that changes while it is read, fails to parse or comes out
+# empty is rejected and the current table stays live; the last rejection is
+# reported on /convert/cache and /metrics.
+SPECIAL_CASES_PATH = os.environ.get(
+    'SPECIAL_CASES_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'special_cases.csv')
+)
+SPECIAL_CASES_RELOAD_INTERVAL = float(os.environ.get('SPECIAL_CASES_RELOAD_INTERVAL', '5'))
+
+
+def load_special_cases(path):
+    """Read {hanzi: georgian} from a CSV or JSON file, keeping file order."""
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        if path.endswith('.json'):
+            data = json.load(f)
+            if not isinstance(data, dict):
+                raise ValueError(f"{path} must contain a JSON object")
+            return {str(k).strip(): str(v).strip() for k, v in data.items()}
+        special_cases = {}
+        for row in csv.DictReader(f):
+            hanzi = (row.get('hanzi') or '').strip()
+            georgian = (row.get('georgian') or '').strip()
+            if hanzi and georgian:
+                special_cases.setdefault(hanzi, georgian)
+        return special_cases
+
+
+def _single_pinyin(hanzi, style):
+    py_syllables = lookup_pinyin(hanzi, style, False)
+    return ' '.join(s[0] for s in py_syllables if s and s[0])
+
+
+def build_special_case_index(special_cases):
+    """Precompute everything a special-case match needs.
+
+    by_hanzi maps each phrase to its Georgian name plus single-reading pinyin
+    and transliteration for both tone settings. by_pinyin maps the compact
+    (space-free, toneless, lowercase) pinyin of each phrase to the phrase;
+    a spaced match always implies a compact one, so one key is enough. The
+    first phrase wins when two share a reading, as in the old linear scan.
+    """
+    by_hanzi = {}
+    by_pinyin = {}
+    for hanzi, georgian in special_cases.items():
+        pinyin_tone = _single_pinyin(hanzi, pypinyin.Style.TONE)
+        pinyin_plain = remove_pinyin_tone_marks(_single_pinyin(hanzi, pypinyin.Style.NORMAL))
+        by_hanzi[hanzi] = {
+            'georgian': georgian,
+            'pinyin': pinyin_tone,
+            'pinyin_plain': pinyin_plain,
+            'translit': map_pinyin_to_georgian(remove_pinyin_tone_marks(pinyin_tone)),
+            'translit_plain': map_pinyin_to_georgian(pinyin_plain),
+        }
+        compact = _single_pinyin(hanzi, pypinyin.Style.NORMAL).lower().replace(' ', '')
+        by_pinyin.setdefault(compact, hanzi)
+    return {'by_hanzi': by_hanzi, 'by_pinyin': by_pinyin, 'trie': build_phrase_trie(by_hanzi)}
+
+
+# Trie nodes are dicts keyed by character; a phrase ends where the node has
+# the '' key, which holds the full phrase. Only phrases of at least
+# MIN_EMBEDDED_PHRASE_LENGTH characters are matched inside longer inputs: a
+# one-character entry (a surname, say) would otherwise take over every text
+# containing that character. Shorter entries still match the whole input.
+MIN_EMBEDDED_PHRASE_LENGTH = 2
+
+
+def build_phrase_trie(phrases):
+    root = {}
+    for phrase in phrases:
+        if len(phrase) < MIN_EMBEDDED_PHRASE_LENGTH:
+            continue
+        node = root
+        for ch in phrase:
+            node = node.setdefault(ch, {})
+        node[''] = phrase
+    return root
+
+
+def segment_special_cases(text, trie):
+    """Split text into (chunk, phrase_or_None) pairs by leftmost-longest match.
+
+    Each position is matched against the trie at most as deep as the longest
+    phrase, so the cost is linear in the text length whatever the number of
+    phrases. Text between matches is returned as (chunk, None).
+    """
+    segments = []
+    plain_start = 0
+    i = 0
+    while i < len(text):
+        node = trie
+        match = None
+        j = i
+        while j < len(text) and text[j] in node:
+            node = node[text[j]]
+            j += 1
+            if '' in node:
+                match = node['']
+        if match is None:
+            i += 1
+            continue
+        if plain_start < i:
+            segments.append((text[plain_start:i], None))
+        segments.append((match, match))
+        i += len(match)
+        plain_start = i
+    if plain_start < len(text):
+        segments.append((text[plain_start:], None))
+    return segments
+
+
+def _file_mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _load_special_case_index(path):
+    before = os.stat(path)
+    mtime = before.st_mtime_ns
+    snapshot = _dictionary_snapshot['special_cases'] if _dictionary_snapshot is not None else None
+    if snapshot and snapshot['path'] == os.path.abspath(path) and snapshot['index']['version'] == mtime:
+        return snapshot['index']
+    special_cases = load_special_cases(path)
+    after = os.stat(path)
+    if (after.st_mtime_ns, after.st_size) != (mtime, before.st_size):
+        raise ValueError("file changed while it was read; replace it by renaming a complete file over it")
+    index = build_special_case_index(special_cases)
+    index['version'] = mtime
+    return index
+
+
+# Outcome of the last loads, for /convert/cache and /metrics. rejected_version
+# is the mtime of the last rejected file, which is not retried until it changes.
+special_cases_reloads = {'reloads': 0, 'errors': 0, 'last_error': None, 'last_error_at': None,
+                         'rejected_version': None}
+
+
+def _special_cases_error(message, version):
+    app.logger.error(f"{message} from {SPECIAL_CASES_PATH}")
+    special_cases_reloads.update(last_error=message, last_error_at=time.time(), rejected_version=version)
+    special_cases_reloads['errors'] += 1
+
+
+try:
+    SPECIAL_CASE_INDEX = _load_special_case_index(SPECIAL_CASES_PATH)
+except Exception as e:
+    _special_cases_error(f"Failed to load special cases: {str(e)}", _file_mtime(SPECIAL_CASES_PATH))
+    SPECIAL_CASE_INDEX = dict(build_special_case_index({}), version=None)
+
+
+def save_dictionary_snapshot(path=None):
+    """Write the current reading, syllable and special-case tables; return the path."""
+    special_cases = None
+    if SPECIAL_CASE_INDEX.get('version') is not None:
+        special_cases = {'path': os.path.abspath(SPECIAL_CASES_PATH), 'index': SPECIAL_CASE_INDEX}
+    tables = {
+        'pinyin_dict': dict(PINYIN_DICT),
+        'syllable_table': GEORGIAN_SYLLABLE_TABLE,
+        'special_cases': special_cases,
+    }
+    signature = _snapshot_signature or snapshot_signature(os.path.abspath(__file__))
+    return write_snapshot(tables, signature, path or DICTIONARY_SNAPSHOT_PATH or DEFAULT_SNAPSHOT_PATH)
+
+
+_special_cases_reload_lock = threading.Lock()
+_special_cases_watcher_lock = threading.Lock()
+_special_cases_watcher_pid = None
+
+
+def reload_special_cases(force=False):
+    """Rebuild the index if the file changed; return True when it was swapped.
+
+    The new index is built off to the side and published with a single
+    assignment, so in-flight requests keep using the old one. Only one
+    thread rebuilds at a time; others return immediately. A broken, empty
+    or still-changing file is recorded in special_cases_reloads and the
+    current index stays in place.
+    """
+    global SPECIAL_CASE_INDEX
+    if not _special_cases_reload_lock.acquire(blocking=False):
+        return False
+    try:
+        mtime = _file_mtime(SPECIAL_CASES_PATH)
+        if not force and (mtime is None or mtime in (SPECIAL_CASE_INDEX.get('version'),
+                                                     special_cases_reloads['rejected_version'])):
+            return False
+        try:
+            index = _load_special_case_index(SPECIAL_CASES_PATH)
+        except Exception as e:
+            _special_cases_error(f"Failed to reload special cases: {str(e)}", mtime)
+            return False
+        if not index['by_hanzi'] and SPECIAL_CASE_INDEX['by_hanzi']:
+            # Most likely a half-written file; write updates via rename instead.
+            _special_cases_error("Refusing to replace special cases with an empty table", mtime)
+            return False
+        SPECIAL_CASE_INDEX = index
+        special_cases_reloads['reloads'] += 1
+        special_cases_reloads['rejected_version'] = None
+        return True
+    finally:
+        _special_cases_reload_lock.release()
+
+
+def _watch_special_cases():
+    while True:
+        time.sleep(max(SPECIAL_CASES_RELOAD_INTERVAL, 0.1))
+        try:
+            reload_special_cases()
+        except Exception as e:
+            app.logger.error(f"Special case reload failed: {str(e)}")
+
+
+def start_special_cases_watcher():
+    """Start the reload thread in this process; threads do not survive fork."""
+    global _special_cases_watcher_pid
+    if SPECIAL_CASES_RELOAD_INTERVAL < 0:
+        return
+    with _special_cases_watcher_lock:
+        if _special_cases_watcher_pid == os.getpid():
+            return
+        _special_cases_watcher_pid = os.getpid()
+        threading.Thread(target=_watch_special_cases, name='special-cases-reload', daemon=True).start()
+
+
+def special_cases_stats():
+    """Size and version of the live table, and how its loads went."""
+    index = SPECIAL_CASE_INDEX
+    stats = {k: v for k, v in special_cases_reloads.items() if k != 'rejected_version'}
+    return dict(stats, entries=len(index['by_hanzi']), version=index.get('version'),
+                rejected=special_cases_reloads['rejected_version'] is not None)
+
+
+def get_special_case_index():
+    """Current special-case index; rebuilds happen on the watcher thread."""
+    if _special_cases_watcher_pid != os.getpid():
+        start_special_cases_watcher()
+    return SPECIAL_CASE_INDEX
+
+
+def special_case_result(entry, include_tones, show_case_suffix):
+    if include_tones:
+        single_pinyin, translit_georgian = entry['pinyin'], entry['translit']
+    else:
+        single_pinyin, translit_georgian = entry['pinyin_plain'], entry['translit_plain']
+    if show_case_suffix:
+        translit_georgian = ensure_georgian_vowel_end(translit_georgian)
+    return {
+        "special": {
+            "pinyin": single_pinyin,
+            "other_pinyin": [],
+            "ქართული": entry['georgian'],
+            "other_georgian": [],
+            "translit_georgian": translit_georgian
+        }
+    }
+
+
+def segmented_special_result(segments, by_hanzi, include_tones, show_case_suffix):
+    """Result for text that contains known phrases inside a longer input.
+
+    Known phrases use their established Georgian name; everything else is
+    transliterated from its single most likely reading.
+    """
+    style = pypinyin.Style.TONE if include_tones else pypinyin.Style.NORMAL
+    pinyin_parts = []
+    georgian_parts = []
+    translit_parts = []
+    segment_info = []
+    for chunk, phrase in segments:
+        if phrase is not None:
+            entry = by_hanzi[phrase]
+            pinyin = entry['pinyin'] if include_tones else entry['pinyin_plain']
+            translit = entry['translit'] if include_tones else entry['translit_plain']
+            georgian = entry['georgian']
+        else:
+            pinyin = _single_pinyin(chunk.strip(), style)
+            if not include_tones:
+                pinyin = remove_pinyin_tone_marks(pinyin)
+            translit = map_pinyin_to_georgian(remove_pinyin_tone_marks(pinyin))
+            georgian = translit
+        if not pinyin.strip():
+            continue
+        pinyin_parts.append(pinyin)
+        georgian_parts.append(georgian)
+        translit_parts.append(translit)
+        segment_info.append({"text": chunk.strip(), "ქართული": georgian, "special": phrase is not None})
+    georgian_text = ' '.join(georgian_parts)
+    translit_georgian = ' '.join(translit_parts)
+    if show_case_suffix:
+        if segments[-1][1] is None:
+            georgian_text = ensure_georgian_vowel_end(georgian_text)
+        translit_georgian = ensure_georgian_vowel_end(translit_georgian)
+    return {
+        "special": {
+            "pinyin": ' '.join(pinyin_parts),
+            "other_pinyin": [],
+            "ქართული": georgian_text,
+            "other_georgian": [],
+            "translit_georgian": translit_georgian,
+            "segments": segment_info
+        }
+    }
 
 
 # ---------------- Conversion ----------------
+def conversion_key(data):
+    """Normalized tuple of everything that affects convert()'s output."""
+    return (
+        str(data.get('text', '')).strip(),
+        bool(data.get('include_tones', False)),
+        bool(data.get('show_case_suffix', True)),
+        data.get('input_language', 'chinese'),
+        data.get('geo_target'),
+        bool(data.get('use_apostrophes', True)),
+        data.get('max_variants'),
+        get_special_case_index().get('version'),
+    )
+
+
+# In-process LRU over convert() results. CONVERT_CACHE_SIZE=0 disables it;
+# CONVERT_CACHE_BACKEND (sqlite:///path or redis://...) shares hits between
+# workers, keeping entries for CONVERT_CACHE_TTL seconds and (SQLite) at most
+# CONVERT_CACHE_MAX_ROWS of them unless the URL says otherwise. Texts longer
+# than MAX_CACHED_TEXT_LENGTH are converted without it.
+result_cache = ResultCache(
+    maxsize=int(os.environ.get('CONVERT_CACHE_SIZE', '4096')),
+    backend=backend_from_url(
+        os.environ.get('CONVERT_CACHE_BACKEND'),
+        ttl=float(os.environ.get('CONVERT_CACHE_TTL', '604800')),
+        max_rows=int(os.environ.get('CONVERT_CACHE_MAX_ROWS', '100000')),
+    ),
+)
+
+
 def convert(data):
+    """Cached front of _convert(); results are shared and must not be mutated."""
+    if result_cache.maxsize <= 0 and result_cache.backend is None:
+        return _convert(data)
+    try:
+        key = conversion_key(data)
+        hash(key)
+    except (TypeError, AttributeError):
+        return _convert(data)
+    if len(key[0]) > MAX_CACHED_TEXT_LENGTH:
+        return _convert(data)
+    result = result_cache.get(key)
+    if result is None:
+        result = _convert(data)
+        if 'error' not in result:
+            result_cache.put(key, result)
+    return result
+
+
+def _convert(data):
     try:
         text = data.get('text', '').strip()
         include_tones = bool(data.get('include_tones', False))
         show_case_suffix = bool(data.get('show_case_suffix', True))
         input_language = data.get('input_language', 'chinese')
         geo_target = data.get('geo_target')
+        max_variants = parse_max_variants(data.get('max_variants'))
 
         if not text:
             return {'error': 'Please enter some text.\nგთხოვთ შეიყვანოთ ტექსტი.'}
 
-        # Special cases (fixed Georgian names)
-        special_cases = {
-            "北京": "პეკინი",
-            "南京": "ნანკინი",
-            "陕西": "შაანსი",
-            "香港": "ჰონგკონგი",
-            "澳门": "მაკაო",
-            "西藏": "ტიბეტი",
-            "乌鲁木齐": "ურუმჩი",
-            "孙中山": "სუნ იატსენი",
-            "蒋介石": "ჩან კაიში",
-            "李小龙": "ბრუს ლი",
-            "成龙": "ჯეკი ჩანი",
-            "成吉思汗": "ჩინგიზ-ყაენი",
-            "忽必烈": "ყუბილაი",
-            "孔子": "კონფუცი",                                                                                                                                                        
-        }
-        
-        # We compute pinyin dynamically for special cases; no static overrides needed.
-
         has_chinese = contains_cjk(text)
+        special_index = get_special_case_index()
 
         # Georgian script conversion path (do not touch Chinese path)
         if input_language in ('geo_to_mkhedruli','geo_to_asomtavruli','geo_to_nuskhuri','geo_to_latin') or input_language == 'georgian':
@@ -415,13 +1395,16 @@ def convert(data):
                     'geo_to_nuskhuri': 'nuskhuri',
                     'geo_to_latin': 'latin',
                 }[input_language]
-            source = detect_georgian_script(text) or 'mkhedruli'
+            with convert_stage_seconds.time('georgian_script'):
+                source = detect_georgian_script(text) or 'mkhedruli'
+                if target == 'latin':
+                    use_apostrophes = bool(data.get('use_apostrophes', True))
+                    converted = transliterate_georgian_to_latin(text, use_apostrophes)
+                else:
+                    converted = convert_georgian_text(text, target)
             if target == 'latin':
-                use_apostrophes = bool(data.get('use_apostrophes', True))
-                converted = transliterate_georgian_to_latin(text, use_apostrophes)
                 return {"georgian_scripts": {"source": source, "to_latin": converted}}
             else:
-                converted = ''.join(convert_georgian_char(ch, target) for ch in text)
                 return {
                     "georgian_scripts": {
                         "source": source,
@@ -438,124 +1421,92 @@ def convert(data):
             normalized_input = re.sub(r"\s+", " ", normalized_input).strip()
             compact_input = normalized_input.replace(" ", "")
 
-            matched_special = None
-            for zh_phrase, geo_name in special_cases.items():
-                # Build no-tone pinyin (single reading) for the special phrase
-                py_no_tone_syllables = pypinyin.pinyin(
-                    zh_phrase, style=pypinyin.Style.NORMAL, heteronym=False
-                )
-                py_no_tone = ' '.join(s[0] for s in py_no_tone_syllables if s and s[0]).lower()
-                py_no_tone_compact = py_no_tone.replace(' ', '')
-
-                if normalized_input == py_no_tone or compact_input == py_no_tone_compact:
-                    matched_special = zh_phrase
-                    break
-
-            if matched_special is not None:
-                # Choose pinyin to display (respect tone toggle)
-                style = pypinyin.Style.TONE if include_tones else pypinyin.Style.NORMAL
-                py_syllables = pypinyin.pinyin(matched_special, style=style, heteronym=False)
-                single_pinyin = ' '.join(s[0] for s in py_syllables if s and s[0])
-                if not include_tones:
-                    single_pinyin = remove_pinyin_tone_marks(single_pinyin)
-
-                translit_georgian = map_pinyin_to_georgian(remove_pinyin_tone_marks(single_pinyin))
-                if show_case_suffix:
-                    translit_georgian = ensure_georgian_vowel_end(translit_georgian)
-
-                return {
-                    "special": {
-                        "pinyin": single_pinyin,
-                        "other_pinyin": [],
-                        "ქართული": special_cases[matched_special],
-                        "other_georgian": [],
-                        "translit_georgian": translit_georgian
-                    }
-                }
+            hanzi = special_index['by_pinyin'].get(compact_input)
+            if hanzi is not None:
+                return special_case_result(special_index['by_hanzi'][hanzi], include_tones, show_case_suffix)
 
         # Special-case override for Chinese input
-        if text in special_cases:
-            # For special cases, show the predefined Georgian name and compute single pinyin
-            style = pypinyin.Style.TONE if include_tones else pypinyin.Style.NORMAL
-            py_syllables = pypinyin.pinyin(text, style=style, heteronym=False)
-            single_pinyin = ' '.join(s[0] for s in py_syllables if s and s[0])
-            if not include_tones:
-                single_pinyin = remove_pinyin_tone_marks(single_pinyin)
+        entry = special_index['by_hanzi'].get(text)
+        if entry is not None:
+            return special_case_result(entry, include_tones, show_case_suffix)
 
-            translit_georgian = map_pinyin_to_georgian(remove_pinyin_tone_marks(single_pinyin))
-            if show_case_suffix:
-                translit_georgian = ensure_georgian_vowel_end(translit_georgian)
+        # Known phrases embedded in a longer Chinese input
+        if has_chinese:
+            with convert_stage_seconds.time('special_cases'):
+                segments = segment_special_cases(text, special_index['trie'])
+            if any(phrase is not None for _, phrase in segments):
+                return segmented_special_result(segments, special_index['by_hanzi'], include_tones, show_case_suffix)
 
+        # Use professional pinyin with heteronym support (CSV removed)
+        id_result = None
+        if has_chinese and not include_tones:
+            with convert_stage_seconds.time('readings'):
+                readings, truncated = bounded_readings(text, False, max_variants)
+                umlaut = has_umlaut_reading(text)
+            # Expansion, Georgian mapping and dedup run fused in one pass
+            with convert_stage_seconds.time('variants'):
+                id_result = no_tone_id_pipeline(
+                    readings,
+                    max_variants,
+                    umlaut=umlaut,
+                    show_case_suffix=show_case_suffix,
+                )
+        if id_result is not None:
+            grouped_variants, georgian_variants = id_result
+            if metrics.enabled:
+                convert_combinations.observe(count_reading_combinations(readings))
+                convert_variants.observe(len(georgian_variants))
             return {
-                "special": {
-                    "pinyin": single_pinyin,
-                    "other_pinyin": [],
-                    "ქართული": special_cases[text],
-                    "other_georgian": [],
-                    "translit_georgian": translit_georgian
+                "ქართული": {
+                    "pinyin": grouped_variants[0] if grouped_variants else "",
+                    "other_pinyin": grouped_variants[1:] if len(grouped_variants) > 1 else [],
+                    "ქართული": georgian_variants[0] if georgian_variants else "",
+                    "other_georgian": georgian_variants[1:] if len(georgian_variants) > 1 else [],
+                    "grouped_pinyin": None,
+                    "grouped_georgian": None,
+                    "truncated": truncated
                 }
             }
 
-        # Use professional pinyin with heteronym support (CSV removed)
-        variants = get_professional_pinyin(text, include_tones)
-        
-        # Generate split-last-two-letters alternates only for pinyin input (no Chinese)
-        if not has_chinese:
-            alternates = []
-            for v in variants:
-                alt = split_last_two_letters_variant(remove_pinyin_tone_marks(v) if not include_tones else v)
-                if alt and alt != v:
-                    alternates.append(alt)
-            if alternates:
-                variants = deduplicate_preserve_order(variants + alternates)
-
-        # Apply grouping/deduplication based on tone setting
-        if include_tones:
-            # Keep original variants with tones, no v→u conversion needed
-            grouped_variants, base_order = group_by_base_with_order(variants)
-        else:
-            # For no-tones case: convert v→u first, then strip tones and deduplicate
-            variants_v_to_u = normalize_pinyin_v_to_u(variants)
-            variants_no_tone = [remove_pinyin_tone_marks(v) for v in variants_v_to_u]
-            grouped_variants = deduplicate_preserve_order(variants_no_tone)
+        with convert_stage_seconds.time('readings'):
+            variants, truncated = iter_professional_pinyin(text, include_tones, max_variants)
 
-        # Georgian mapping
         if include_tones:
-            # Use base_order so each group maps to a single Georgian variant
-            georgian_variants = [map_pinyin_to_georgian(b) for b in base_order]
-            if show_case_suffix:
-                georgian_variants = [ensure_georgian_vowel_end(g) for g in georgian_variants]
-            georgian_variants = deduplicate_preserve_order(georgian_variants)
+            with convert_stage_seconds.time('expansion'):
+                variants = list(variants)
+                # Generate split-last-two-letters alternates only for pinyin input (no Chinese)
+                if not has_chinese:
+                    alternates = []
+                    for v in variants:
+                        alt = split_last_two_letters_variant(v)
+                        if alt and alt != v:
+                            alternates.append(alt)
+                    if alternates:
+                        variants = deduplicate_preserve_order(variants + alternates)
+
+            with convert_stage_seconds.time('dedup'):
+                # Keep original variants with tones, no v→u conversion needed
+                grouped_variants, base_order = group_by_base_with_order(variants)
+
+            with convert_stage_seconds.time('georgian'):
+                # Use base_order so each group maps to a single Georgian variant
+                georgian_variants = [map_pinyin_to_georgian(b) for b in base_order]
+                if show_case_suffix:
+                    georgian_variants = [ensure_georgian_vowel_end(g) for g in georgian_variants]
+                georgian_variants = deduplicate_preserve_order(georgian_variants)
         else:
-            # For no-tones: map using original variants (before v→u conversion) for correct Georgian
-            # Include both original and split-last-two-letters variants before mapping
-            base_variants = deduplicate_preserve_order(
-                [remove_pinyin_tone_marks(v) for v in variants]
-            )
-            # Only add split-last-two-letters variants for pinyin input (no Chinese)
-            if not has_chinese:
-                split_bases = []
-                for bv in base_variants:
-                    alt = split_last_two_letters_variant(bv)
-                    if alt and alt != bv:
-                        split_bases.append(alt)
-                base_variants = deduplicate_preserve_order(base_variants + split_bases)
-            georgian_variants = [map_pinyin_to_georgian(bv) for bv in base_variants]
-            # In no-tones, check toneful pinyin: if any variant contains ü (or input uses v),
+            # In no-tones, check toneful pinyin: if any reading contains ü,
             # render Georgian 'უ' as 'იუ'. Applies to both Chinese and pinyin inputs.
-            toneful_variants = get_professional_pinyin(text, include_tones=True)
-            has_umlaut = False
-            for tv in toneful_variants:
-                tv_no_mark = remove_pinyin_tone_marks(tv)
-                if 'ü' in tv_no_mark or ('v' in tv and not has_chinese):
-                    has_umlaut = True
-                    break
-            if has_umlaut:
-                # Replace standalone 'უ' with 'იუ', but don't double-convert existing 'იუ'
-                georgian_variants = [re.sub(r'(?<!ი)უ', 'იუ', g) if g else g for g in georgian_variants]
-            if show_case_suffix:
-                georgian_variants = [ensure_georgian_vowel_end(g) for g in georgian_variants]
-            georgian_variants = deduplicate_preserve_order(georgian_variants)
+            with convert_stage_seconds.time('variants'):
+                grouped_variants, georgian_variants = no_tone_variant_pipeline(
+                    variants,
+                    split_alternates=not has_chinese,
+                    umlaut=has_umlaut_reading(text),
+                    show_case_suffix=show_case_suffix,
+                )
+        if metrics.enabled:
+            convert_combinations.observe(count_reading_combinations(text_readings(text, include_tones)))
+            convert_variants.observe(len(georgian_variants))
 
         return {
             "ქართული": {
@@ -564,7 +1515,8 @@ def convert(data):
                 "ქართული": georgian_variants[0] if georgian_variants else "",
                 "other_georgian": georgian_variants[1:] if len(georgian_variants) > 1 else [],
                 "grouped_pinyin": grouped_variants if include_tones else None,
-                "grouped_georgian": georgian_variants if include_tones else None
+                "grouped_georgian": georgian_variants if include_tones else None,
+                "truncated": truncated
             }
         }
 
@@ -572,6 +1524,442 @@ def convert(data):
         return {"error": str(e)}
 
 
+# ---------------- Batch conversion ----------------
+MAX_BATCH_ITEMS = 10000
+
+
+def convert_batch(items, defaults=None):
+    """Convert many inputs in order; duplicates are converted only once.
+
+    Each item is either a string or a dict with the same fields as convert();
+    fields from defaults apply unless the item overrides them. Items share
+    pypinyin work per run and segment (segment_run, segment_readings), so
+    a surname list resolves each character or phrase once.
+    """
+    defaults = defaults or {}
+    results = []
+    done = {}
+    for item in items:
+        if isinstance(item, str):
+            item = {'text': item}
+        elif not isinstance(item, dict):
+            results.append({"error": "Each item must be a string or an object"})
+            continue
+        data = dict(defaults)
+        data.update(item)
+        try:
+            key = conversion_key(data)
+            hash(key)
+        except TypeError:
+            results.append(convert(data))
+            continue
+        if key not in done:
+            done[key] = convert(data)
+        results.append(done[key])
+    return results
+
+
+# ---------------- Streaming (NDJSON) conversion ----------------
+def parse_stream_line(line, input_format='auto'):
+    """Turn one input line into convert() data, or None for blank lines.
+
+    input_format is 'text' (the line is the text), 'jsonl' (the line is a JSON
+    object or string) or 'auto' (JSON when the line starts with '{' or '"').
+    """
+    if isinstance(line, bytes):
+        line = line.decode('utf-8')
+    line = line.lstrip('\ufeff').strip()
+    if not line:
+        return None
+    if input_format == 'jsonl' or (input_format == 'auto' and line[0] in '{"'):
+        item = json.loads(line)
+        return {'text': item} if isinstance(item, str) else item
+    return {'text': line}
+
+
+def iter_convert_lines(lines, defaults=None, input_format='auto'):
+    """Convert an iterable of lines lazily, yielding one NDJSON line per input."""
+    defaults = defaults or {}
+    for line in lines:
+        try:
+            item = parse_stream_line(line, input_format)
+        except ValueError as e:
+            yield json.dumps({"error": f"Invalid JSON line: {str(e)}"}, ensure_ascii=False) + '\n'
+            continue
+        if item is None:
+            continue
+        if not isinstance(item, dict):
+            yield json.dumps({"error": "Each line must be text or a JSON object"}, ensure_ascii=False) + '\n'
+            continue
+        data = dict(defaults)
+        data.update(item)
+        record = {"text": data.get('text', ''), "result": convert(data)}
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+
+# ---------------- English upstream (goods4good) ----------------
+ENGLISH_API_URL = os.environ.get('ENGLISH_API_URL', 'https://goods4good.net/convertor4/api.php')
+ENGLISH_UPSTREAM_TIMEOUT = float(os.environ.get('ENGLISH_UPSTREAM_TIMEOUT', '10'))
+# Overall budget for one /convert-english request, suggestions included
+ENGLISH_REQUEST_DEADLINE = float(os.environ.get('ENGLISH_REQUEST_DEADLINE', '12'))
+ENGLISH_MAX_WORKERS = int(os.environ.get('ENGLISH_MAX_WORKERS', '16'))
+
+# One keep-alive session and one thread pool shared by all requests
+upstream_session = requests.Session()
+upstream_session.verify = False
+upstream_session.mount('https://', requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=ENGLISH_MAX_WORKERS))
+upstream_session.mount('http://', requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=ENGLISH_MAX_WORKERS))
+upstream_executor = ThreadPoolExecutor(max_workers=ENGLISH_MAX_WORKERS, thread_name_prefix='upstream')
+
+
+def _remaining(deadline):
+    """Per-call timeout: the upstream timeout capped by what is left of the deadline."""
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise TimeoutError("Request deadline exceeded")
+    return min(ENGLISH_UPSTREAM_TIMEOUT, remaining)
+
+
+# Successful upstream responses are cached for ENGLISH_CACHE_TTL seconds, and
+# concurrent requests for the same word share a single upstream call.
+ENGLISH_CACHE_TTL = float(os.environ.get('ENGLISH_CACHE_TTL', '3600'))
+ENGLISH_CACHE_SIZE = int(os.environ.get('ENGLISH_CACHE_SIZE', '4096'))
+suggestions_cache = TTLCache(maxsize=ENGLISH_CACHE_SIZE, ttl=ENGLISH_CACHE_TTL)
+transliteration_cache = TTLCache(maxsize=ENGLISH_CACHE_SIZE, ttl=ENGLISH_CACHE_TTL)
+upstream_flight = SingleFlight()
+
+
+def _cached_upstream_call(cache, key, fetch, timeout):
+    data = cache.get(key)
+    if data is not None:
+        return data
+
+    def load():
+        data = fetch()
+        if data.get('success'):
+            cache.put(key, data)
+        return data
+
+    return upstream_flight.do(key, load, timeout=timeout)
+
+
+# Circuit breaker and concurrency cap so a slow upstream cannot starve /convert
+upstream_breaker = CircuitBreaker(
+    failure_threshold=int(os.environ.get('ENGLISH_BREAKER_THRESHOLD', '5')),
+    reset_timeout=float(os.environ.get('ENGLISH_BREAKER_RESET', '30')),
+)
+upstream_limiter = ConcurrencyLimiter(
+    limit=int(os.environ.get('ENGLISH_MAX_CONCURRENT', str(ENGLISH_MAX_WORKERS))),
+    wait_timeout=float(os.environ.get('ENGLISH_QUEUE_TIMEOUT', '0.5')),
+)
+
+
+def upstream_outcome(status_code):
+    if status_code >= 500:
+        return 'server_error'
+    return 'client_error' if status_code >= 400 else 'ok'
+
+
+def _guarded_upstream(send, call='upstream'):
+    """Run one upstream HTTP call under the concurrency limit and breaker.
+
+    Transport errors and 5xx responses count as breaker failures; 4xx
+    responses are the caller's problem and leave the breaker alone. Any
+    other exception records nothing but still frees a half-open probe.
+    """
+    with upstream_limiter:
+        probe = upstream_breaker.before_call()
+        started = time.perf_counter()
+        try:
+            try:
+                response = send()
+            except requests.RequestException:
+                upstream_seconds.observe(time.perf_counter() - started, call, 'transport_error')
+                upstream_breaker.record_failure()
+                raise
+            upstream_seconds.observe(time.perf_counter() - started, call, upstream_outcome(response.status_code))
+            if response.status_code >= 500:
+                upstream_breaker.record_failure()
+            else:
+                upstream_breaker.record_success()
+            response.raise_for_status()
+            return response.json()
+        finally:
+            if probe:
+                upstream_breaker.release_probe()
+
+
+def _get_suggestions(word, timeout):
+    return _guarded_upstream(lambda: upstream_session.get(
+        ENGLISH_API_URL, params={"action": "suggestions", "q": word}, timeout=timeout
+    ), 'suggestions')
+
+
+def _post_transliteration(word, timeout):
+    return _guarded_upstream(lambda: upstream_session.post(
+        ENGLISH_API_URL, params={"action": "transliterate"}, json={"word": word}, timeout=timeout
+    ), 'transliterate')
+
+
+def fetch_suggestions(word, timeout=ENGLISH_UPSTREAM_TIMEOUT):
+    return _cached_upstream_call(
+        suggestions_cache, ('suggestions', word), lambda: _get_suggestions(word, timeout), timeout
+    )
+
+
+def fetch_transliteration(word, timeout=ENGLISH_UPSTREAM_TIMEOUT):
+    return _cached_upstream_call(
+        transliteration_cache, ('transliterate', word), lambda: _post_transliteration(word, timeout), timeout
+    )
+
+
+def build_transliteration_result(suggestion, transliterate_data):
+    """Shape one upstream transliteration for the response, or None if unusable."""
+    if not (transliterate_data.get('success') and transliterate_data.get('data')):
+        return None
+    result_data = transliterate_data['data']
+    return {
+        "word": suggestion.get('word', ''),
+        "georgian": result_data.get('transliteration', ''),
+        "ipa": result_data.get('ipa', ''),
+        "cleanIpa": result_data.get('cleanIpa', ''),
+        "confidence": result_data.get('confidence', 0),
+        "method": result_data.get('method', ''),
+        "variants": result_data.get('variants', []),
+        "relevance": suggestion.get('relevance', 0),
+        "source": suggestion.get('source', '')
+    }
+
+
+def _transliterate_suggestion(suggestion, deadline):
+    transliterate_data = fetch_transliteration(suggestion.get('word', ''), timeout=_remaining(deadline))
+    return build_transliteration_result(suggestion, transliterate_data)
+
+
+def transliterate_suggestions(suggestions, deadline):
+    """Transliterate suggestions in parallel; return (results, partial).
+
+    Results keep suggestion order. Calls still running at the deadline are
+    abandoned and reported through partial=True, as are failed calls. If
+    nothing succeeded and every failure was UpstreamUnavailable (breaker
+    open, too busy), that error is raised so the caller can answer 503.
+    """
+    futures = [
+        (suggestion.get('word', ''), upstream_executor.submit(_transliterate_suggestion, suggestion, deadline))
+        for suggestion in suggestions if suggestion.get('word', '')
+    ]
+    done, not_done = wait([f for _, f in futures], timeout=max(0, deadline - time.monotonic()))
+    for future in not_done:
+        future.cancel()
+    results = []
+    errors = []
+    partial = bool(not_done)
+    for word_to_transliterate, future in futures:
+        if future not in done:
+            continue
+        try:
+            result = future.result()
+        except Exception as e:
+            # Continue with other suggestions even if one fails
+            if not isinstance(e, UpstreamUnavailable):
+                app.logger.error(f"Failed to transliterate {word_to_transliterate}: {str(e)}")
+            errors.append(e)
+            partial = True
+            continue
+        if result is not None:
+            results.append(result)
+    raise_if_all_unavailable(results, errors)
+    return results, partial
+
+
+def raise_if_all_unavailable(results, errors):
+    """Raise the longest-waiting UpstreamUnavailable if it explains every failure."""
+    if not results and errors and all(isinstance(e, UpstreamUnavailable) for e in errors):
+        raise max(errors, key=lambda e: e.retry_after)
+
+
+def upstream_unavailable_response(e):
+    response = jsonify({"error": f"Transliteration service unavailable: {str(e)}"})
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response, 503
+
+
+# ---------------- Streaming Georgian script conversion ----------------
+GEORGIAN_STREAM_CHUNK_SIZE = 64 * 1024
+GEORGIAN_STREAM_TARGETS = ('mkhedruli', 'asomtavruli', 'nuskhuri', 'latin')
+
+
+def georgian_text_converter(target, use_apostrophes=True):
+    """Return a str → str function converting Georgian text to target."""
+    if target not in GEORGIAN_STREAM_TARGETS:
+        raise ValueError(f"target must be one of {', '.join(GEORGIAN_STREAM_TARGETS)}")
+    if target == 'latin':
+        return lambda text: transliterate_georgian_to_latin(text, use_apostrophes)
+    return lambda text: convert_georgian_text(text, target)
+
+
+def iter_convert_georgian_chunks(chunks, target, use_apostrophes=True):
+    """Convert an iterable of byte or str chunks to the target script lazily.
+
+    Letters are converted independently, so each chunk is translated on its
+    own; an incremental decoder keeps UTF-8 sequences split across chunk
+    boundaries intact.
+    """
+    convert_text = georgian_text_converter(target, use_apostrophes)
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    for chunk in chunks:
+        text = decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+        if text:
+            yield convert_text(text)
+    # A truncated trailing sequence becomes U+FFFD, which no table touches
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+
+def iter_file_chunks(f, size=GEORGIAN_STREAM_CHUNK_SIZE):
+    while True:
+        chunk = f.read(size)
+        if not chunk:
+            return
+        yield chunk
+
+
+# ---------------- Incremental (keystroke) conversion ----------------
+# Live-typing sessions: the client sends edits against the text it last sent
+# and gets back only the result fields that changed. This saves upload and
+# response size, not conversion work: every edit converts the whole new
+# text through convert(), with only the shared per-run and per-segment
+# reading caches to help. Sessions are kept in
+# INCREMENTAL_SESSION_BACKEND (default: CONVERT_CACHE_BACKEND) so any worker
+# can serve the next edit; without a backend they live in this worker's
+# memory and the load balancer must route a session to one worker. An
+# unknown session answers 409 and the client resends the full text.
+INCREMENTAL_SESSION_TTL = float(os.environ.get('INCREMENTAL_SESSION_TTL', '900'))
+INCREMENTAL_SESSIONS = int(os.environ.get('INCREMENTAL_SESSIONS', '10000'))
+INCREMENTAL_SESSION_BACKEND = os.environ.get('INCREMENTAL_SESSION_BACKEND', os.environ.get('CONVERT_CACHE_BACKEND'))
+if INCREMENTAL_SESSION_BACKEND:
+    # No in-process layer: another worker may have advanced the session
+    incremental_sessions = ResultCache(
+        maxsize=0,
+        backend=backend_from_url(INCREMENTAL_SESSION_BACKEND, namespace='incremental',
+                                 ttl=INCREMENTAL_SESSION_TTL, max_rows=INCREMENTAL_SESSIONS),
+    )
+else:
+    incremental_sessions = TTLCache(maxsize=INCREMENTAL_SESSIONS, ttl=INCREMENTAL_SESSION_TTL)
+
+
+def apply_text_delta(text, delta):
+    """Replace text[start:end] with delta['insert'] (indices in code points)."""
+    start = delta.get('start')
+    end = delta.get('end', start)
+    insert = delta.get('insert', '')
+    if not isinstance(start, int) or not isinstance(end, int) or not isinstance(insert, str):
+        raise ValueError("delta needs integer start/end and a string insert")
+    if not 0 <= start <= end <= len(text):
+        raise ValueError("delta range is outside the current text")
+    return text[:start] + insert + text[end:]
+
+
+def diff_list(old, new):
+    """new as {"keep": n, "append": [...]}: old[:n] followed by the new items."""
+    keep = 0
+    for a, b in zip(old, new):
+        if a != b:
+            break
+        keep += 1
+    return {"keep": keep, "append": new[keep:]}
+
+
+def diff_result(old, new):
+    """Fields of new that differ from old, or None if the shapes differ.
+
+    Results have a single top-level kind ("ქართული", "special", ...); a
+    change of kind needs the full result. A list field that shares a prefix
+    with its old value (other_pinyin, other_georgian, ...) is sent as a
+    diff_list() instead of in full.
+    """
+    if old is None or old.keys() != new.keys() or len(new) != 1:
+        return None
+    kind = next(iter(new))
+    old_fields, new_fields = old[kind], new[kind]
+    if not isinstance(old_fields, dict) or not isinstance(new_fields, dict):
+        return None
+    changes = {}
+    for field, value in new_fields.items():
+        previous = old_fields.get(field)
+        if previous == value:
+            continue
+        if isinstance(previous, list) and isinstance(value, list) and value[:1] == previous[:1]:
+            changes[field] = diff_list(previous, value)
+        else:
+            changes[field] = value
+    changes.update({f: None for f in old_fields if f not in new_fields})
+    return {kind: changes}
+
+
+def select_fields(result, fields):
+    """result with each kind's fields limited to fields (None keeps all)."""
+    if fields is None or result is None:
+        return result
+    return {kind: {f: v for f, v in value.items() if f in fields} if isinstance(value, dict) else value
+            for kind, value in result.items()}
+
+
+def convert_incremental(data):
+    """Apply one edit to a session and return (response, status).
+
+    data holds either 'text' (start or resync a session) or 'session',
+    'version' and 'delta' ({start, end, insert}), plus the usual convert()
+    options. The response carries the new version and either the full
+    'result' or just the changed fields under 'changes'. An optional
+    'fields' list (e.g. ["pinyin", "ქართული"]) limits both to those fields,
+    so a client can skip the other_* lists while the user is typing.
+    """
+    options = {k: v for k, v in data.items() if k not in ('text', 'session', 'version', 'delta', 'fields')}
+    fields = data.get('fields')
+    if fields is not None and (not isinstance(fields, list) or not all(isinstance(f, str) for f in fields)):
+        return {"error": "fields must be a list of field names"}, 400
+    token = data.get('session')
+    session = incremental_sessions.get(token) if token else None
+
+    if 'delta' in data:
+        if session is None:
+            return {"error": "Unknown or expired session; resend the full text", "resync": True}, 409
+        if data.get('version') != session['version']:
+            return {"error": "Version mismatch; resend the full text", "resync": True}, 409
+        try:
+            text = apply_text_delta(session['text'], data['delta'])
+        except (ValueError, AttributeError) as e:
+            return {"error": str(e), "resync": True}, 400
+    elif 'text' in data:
+        text = data['text']
+    else:
+        return {"error": "Send either text or delta"}, 400
+
+    if session is None:
+        token = secrets.token_urlsafe(16)
+        previous = None
+        version = 0
+    else:
+        previous = session['result'] if session['options'] == options else None
+        version = session['version'] + 1
+        if previous is not None and text.strip() == session['text'].strip():
+            # The edit does not change what convert() sees (e.g. trailing space)
+            incremental_sessions.put(token, dict(session, text=text, version=version))
+            return {"session": token, "version": version, "changes": diff_result(previous, previous)}, 200
+
+    result = convert(dict(options, text=text))
+    incremental_sessions.put(token, {"text": text, "options": options, "result": result, "version": version})
+    changes = diff_result(select_fields(previous, fields), select_fields(result, fields))
+    response = {"session": token, "version": version}
+    if changes is None:
+        response["result"] = select_fields(result, fields)
+    else:
+        response["changes"] = changes
+    return response, 200
+
+
 # ---------------- Flask routes ---------------
 @app.route('/')
 def index():
@@ -608,14 +1996,13 @@ def convert_english_endpoint():
         if not word:
             return jsonify({"error": "Word is required"}), 400
         
+        deadline = time.monotonic() + ENGLISH_REQUEST_DEADLINE
+
         # Step 1: Get suggestions
-        suggestions_url = "https://goods4good.net/convertor4/api.php"
-        suggestions_params = {"action": "suggestions", "q": word}
-        
         try:
-            suggestions_response = requests.get(suggestions_url, params=suggestions_params, timeout=10, verify=False)
-            suggestions_response.raise_for_status()
-            suggestions_data = suggestions_response.json()
+            suggestions_data = fetch_suggestions(word, timeout=_remaining(deadline))
+        except UpstreamUnavailable as e:
+            return upstream_unavailable_response(e)
         except Exception as e:
             return jsonify({"error": f"Failed to fetch suggestions: {str(e)}"}), 500
         
@@ -624,42 +2011,11 @@ def convert_english_endpoint():
         
         suggestions = suggestions_data['data']['suggestions']
         
-        # Step 2: Transliterate each suggestion
-        transliterate_url = "https://goods4good.net/convertor4/api.php?action=transliterate"
-        results = []
-        
-        for suggestion in suggestions:
-            word_to_transliterate = suggestion.get('word', '')
-            if not word_to_transliterate:
-                continue
-            
-            try:
-                transliterate_response = requests.post(
-                    transliterate_url,
-                    json={"word": word_to_transliterate},
-                    timeout=10,
-                    verify=False
-                )
-                transliterate_response.raise_for_status()
-                transliterate_data = transliterate_response.json()
-                
-                if transliterate_data.get('success') and transliterate_data.get('data'):
-                    result_data = transliterate_data['data']
-                    results.append({
-                        "word": word_to_transliterate,
-                        "georgian": result_data.get('transliteration', ''),
-                        "ipa": result_data.get('ipa', ''),
-                        "cleanIpa": result_data.get('cleanIpa', ''),
-                        "confidence": result_data.get('confidence', 0),
-                        "method": result_data.get('method', ''),
-                        "variants": result_data.get('variants', []),
-                        "relevance": suggestion.get('relevance', 0),
-                        "source": suggestion.get('source', '')
-                    })
-            except Exception as e:
-                # Continue with other suggestions even if one fails
-                app.logger.error(f"Failed to transliterate {word_to_transliterate}: {str(e)}")
-                continue
+        # Step 2: Transliterate all suggestions concurrently
+        try:
+            results, partial = transliterate_suggestions(suggestions, deadline)
+        except UpstreamUnavailable as e:
+            return upstream_unavailable_response(e)
         
         if not results:
             return jsonify({"error": "No transliterations found"}), 404
@@ -672,7 +2028,8 @@ def convert_english_endpoint():
             "success": True,
             "query": word,
             "results": main_results,
-            "variants": variants
+            "variants": variants,
+            "partial": partial
         })
         
     except Exception as e:
@@ -680,6 +2037,39 @@ def convert_english_endpoint():
         return jsonify({"error": str(e)}), 500
 
 
+@app.route('/convert-english/status', methods=['GET'])
+def convert_english_status():
+    return jsonify({
+        "breaker": upstream_breaker.stats(),
+        "concurrency": upstream_limiter.stats(),
+        "suggestions_cache": suggestions_cache.stats(),
+        "transliteration_cache": transliteration_cache.stats(),
+        "coalesced": upstream_flight.coalesced,
+    })
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    if not metrics.enabled:
+        return jsonify({"error": "Metrics are disabled; set METRICS_ENABLED=1"}), 404
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/debug/profile/samples', methods=['GET'])
+def profile_samples_endpoint():
+    """Collapsed stacks sampled so far in this worker; ?reset=1 starts over."""
+    if stack_sampler is None:
+        return jsonify({"error": "Stack sampling is disabled; set PROFILE_SAMPLE_INTERVAL"}), 404
+    refused = check_profile_access(None, request.headers.get('X-Profile-Token'))
+    if refused is not None:
+        return jsonify({"error": refused[0]}), refused[1]
+    response = Response(stack_sampler.collapsed(), mimetype='text/plain')
+    response.headers['X-Profile-Samples'] = str(stack_sampler.samples)
+    if request.args.get('reset', '').lower() in ('1', 'true', 'yes'):
+        stack_sampler.reset()
+    return response
+
+
 @app.route('/convert', methods=['POST', 'OPTIONS'])
 def convert_endpoint():
     if request.method == 'OPTIONS':
@@ -690,6 +2080,12 @@ def convert_endpoint():
         data = request.get_json()
         if data is None:
             return jsonify({"error": "Invalid JSON data"}), 400
+        profile_format = request.headers.get('X-Profile') or request.args.get('profile')
+        if PROFILING_ENABLED and profile_format:
+            refused = check_profile_access(profile_format, request.headers.get('X-Profile-Token'))
+            if refused is not None:
+                return jsonify({"error": refused[0]}), refused[1]
+            return jsonify(profiled_convert(data, profile_format))
         result = convert(data)
         return jsonify(result)
     except Exception as e:
@@ -697,5 +2093,101 @@ def convert_endpoint():
         return jsonify({"error": str(e)}), 500
 
 
+@app.route('/convert/cache', methods=['GET'])
+def convert_cache_stats():
+    return jsonify(dict(result_cache.stats(), special_cases=special_cases_stats()))
+
+
+@app.route('/convert/batch', methods=['POST', 'OPTIONS'])
+def convert_batch_endpoint():
+    if request.method == 'OPTIONS':
+        return '', 200
+    try:
+        if not request.is_json:
+            return jsonify({"error": "Request must be JSON"}), 400
+        data = request.get_json()
+        if data is None:
+            return jsonify({"error": "Invalid JSON data"}), 400
+        items = data.get('items')
+        if not isinstance(items, list):
+            return jsonify({"error": "items must be a list"}), 400
+        if len(items) > MAX_BATCH_ITEMS:
+            return jsonify({"error": f"At most {MAX_BATCH_ITEMS} items per batch"}), 413
+        defaults = {k: v for k, v in data.items() if k != 'items'}
+        return jsonify({"results": convert_batch(items, defaults)})
+    except Exception as e:
+        app.logger.error(f"Error in convert_batch_endpoint: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/convert/stream', methods=['POST', 'OPTIONS'])
+def convert_stream_endpoint():
+    """Stream NDJSON results for a newline-delimited request body.
+
+    Conversion options can be passed as query parameters and apply to every
+    line; JSON lines may override them.
+    """
+    if request.method == 'OPTIONS':
+        return '', 200
+    defaults = {}
+    for key in ('input_language', 'geo_target'):
+        if key in request.args:
+            defaults[key] = request.args[key]
+    for key in ('include_tones', 'show_case_suffix', 'use_apostrophes'):
+        if key in request.args:
+            defaults[key] = request.args[key].lower() in ('1', 'true', 'yes')
+    if 'max_variants' in request.args:
+        defaults['max_variants'] = request.args['max_variants']
+    input_format = request.args.get('format', 'auto')
+    lines = iter(request.stream.readline, b'')
+    return Response(
+        stream_with_context(iter_convert_lines(lines, defaults, input_format)),
+        mimetype='application/x-ndjson'
+    )
+
+
+@app.route('/convert/georgian/stream', methods=['POST', 'OPTIONS'])
+def convert_georgian_stream_endpoint():
+    """Stream a Georgian document converted to ?target= (default mkhedruli).
+
+    The body is either the raw UTF-8 text or a multipart upload in the
+    'file' field. use_apostrophes=0 selects the plain Latin mapping.
+    """
+    if request.method == 'OPTIONS':
+        return '', 200
+    target = request.args.get('target', 'mkhedruli')
+    if target not in GEORGIAN_STREAM_TARGETS:
+        return jsonify({"error": f"target must be one of {', '.join(GEORGIAN_STREAM_TARGETS)}"}), 400
+    use_apostrophes = request.args.get('use_apostrophes', '1').lower() in ('1', 'true', 'yes')
+    if request.mimetype == 'multipart/form-data':
+        upload = request.files.get('file')
+        if upload is None:
+            return jsonify({"error": "Missing 'file' upload"}), 400
+        source = upload.stream
+    else:
+        source = request.stream
+    return Response(
+        stream_with_context(iter_convert_georgian_chunks(iter_file_chunks(source), target, use_apostrophes)),
+        mimetype='text/plain'
+    )
+
+
+@app.route('/convert/incremental', methods=['POST', 'OPTIONS'])
+def convert_incremental_endpoint():
+    if request.method == 'OPTIONS':
+        return '', 200
+    try:
+        if not request.is_json:
+            return jsonify({"error": "Request must be JSON"}), 400
+        data = request.get_json()
+        if not isinstance(data, dict):
+            return jsonify({"error": "Invalid JSON data"}), 400
+        body, status = convert_incremental(data)
+        return jsonify(body), status
+    except Exception as e:
+        app.logger.error(f"Error in convert_incremental_endpoint: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
 if __name__ == '__main__':
     app.run(debug=True, port=8080, host='0.0.0.0')
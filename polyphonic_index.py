@@ -0,0 +1,153 @@
+"""Compact binary index of polyphonic_full.csv.
+
+The CSV is compiled once into polyphonic_index.bin, which is memory-mapped
+read-only, so every gunicorn worker on a host shares the same pages through
+the page cache instead of holding its own parsed copy.
+
+Layout (all integers little-endian):
+
+    header      magic b'PPIX', version, n_chars, n_readings, n_refs   (5 x u32)
+    codepoints  n_chars x u32, sorted
+    starts      (n_chars + 1) x u32, offsets into refs
+    refs        n_refs x u16, reading ids, most common reading first
+    text_starts (n_readings + 1) x u32, offsets into text
+    text        UTF-8 readings, concatenated
+
+Importing the service only reads the file; build it as a deploy step (the
+Procfile does this before starting gunicorn) and after editing the CSV:
+
+    python -m polyphonic_index build [polyphonic_full.csv] [polyphonic_index.bin]
+"""
+import array
+import bisect
+import csv
+import logging
+import mmap
+import os
+import struct
+import sys
+
+MAGIC = b'PPIX'
+VERSION = 1
+HEADER = struct.Struct('<4sIIII')
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CSV_PATH = os.path.join(BASE_DIR, 'polyphonic_full.csv')
+DEFAULT_INDEX_PATH = os.path.join(BASE_DIR, 'polyphonic_index.bin')
+
+logger = logging.getLogger(__name__)
+
+
+def _little_endian(arr):
+    if sys.byteorder != 'little':
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def _native(buf, typecode):
+    arr = array.array(typecode)
+    arr.frombytes(buf)
+    if sys.byteorder != 'little':
+        arr.byteswap()
+    return arr
+
+
+def build_index(csv_path=DEFAULT_CSV_PATH, index_path=DEFAULT_INDEX_PATH):
+    """Compile the CSV into the binary index; the file is replaced atomically."""
+    readings_by_cp = {}
+    with open(csv_path, 'r', encoding='utf-8-sig') as f:
+        for row in csv.DictReader(f):
+            readings = row['all_readings'].split()
+            for ch in (row['char_simpl'], row['char_trad']):
+                if len(ch) == 1:
+                    readings_by_cp.setdefault(ord(ch), readings)
+
+    reading_ids = {}
+    codepoints = array.array('I')
+    starts = array.array('I', [0])
+    refs = array.array('H')
+    for cp in sorted(readings_by_cp):
+        codepoints.append(cp)
+        for reading in readings_by_cp[cp]:
+            refs.append(reading_ids.setdefault(reading, len(reading_ids)))
+        starts.append(len(refs))
+
+    text = bytearray()
+    text_starts = array.array('I', [0])
+    for reading in reading_ids:
+        text += reading.encode('utf-8')
+        text_starts.append(len(text))
+
+    tmp_path = f'{index_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(codepoints), len(reading_ids), len(refs)))
+        for arr in (codepoints, starts, refs, text_starts):
+            f.write(_little_endian(arr))
+        f.write(text)
+    os.replace(tmp_path, index_path)
+    return index_path
+
+
+class PolyphonicIndex:
+    """Read-only view over a memory-mapped polyphonic index file."""
+
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, n_chars, n_readings, n_refs = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{path} is not a polyphonic index (version {VERSION})')
+        offset = HEADER.size
+        sections = []
+        for typecode, count in (('I', n_chars), ('I', n_chars + 1), ('H', n_refs), ('I', n_readings + 1)):
+            size = array.array(typecode).itemsize * count
+            view = memoryview(self._mm)[offset:offset + size]
+            # Zero-copy on little-endian hosts; big-endian hosts get a private copy.
+            sections.append(view.cast(typecode) if sys.byteorder == 'little' else _native(view, typecode))
+            offset += size
+        self._codepoints, self._starts, self._refs, self._text_starts = sections
+        self._text_offset = offset
+        self._reading_cache = {}
+
+    def __len__(self):
+        return len(self._codepoints)
+
+    def _reading(self, reading_id):
+        reading = self._reading_cache.get(reading_id)
+        if reading is None:
+            start = self._text_offset + self._text_starts[reading_id]
+            end = self._text_offset + self._text_starts[reading_id + 1]
+            reading = self._mm[start:end].decode('utf-8')
+            self._reading_cache[reading_id] = reading
+        return reading
+
+    def readings(self, ch):
+        """Toned readings for one character, most common first, or None."""
+        cp = ord(ch)
+        i = bisect.bisect_left(self._codepoints, cp)
+        if i == len(self._codepoints) or self._codepoints[i] != cp:
+            return None
+        return [self._reading(self._refs[j]) for j in range(self._starts[i], self._starts[i + 1])]
+
+
+def load_index(csv_path=DEFAULT_CSV_PATH, index_path=DEFAULT_INDEX_PATH):
+    """Open a built index, or return None if there is none; never writes."""
+    try:
+        index = PolyphonicIndex(index_path)
+    except FileNotFoundError:
+        logger.warning(f'{index_path} is missing; run `python -m polyphonic_index build`')
+        return None
+    try:
+        if os.path.getmtime(index_path) < os.path.getmtime(csv_path):
+            logger.warning(f'{index_path} is older than {csv_path}; run `python -m polyphonic_index build`')
+    except OSError:
+        pass
+    return index
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    if args[:1] != ['build']:
+        sys.exit('usage: python -m polyphonic_index build [polyphonic_full.csv] [polyphonic_index.bin]')
+    built = build_index(*args[1:])
+    print(f'Wrote {built} ({len(PolyphonicIndex(built))} characters)')
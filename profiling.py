@@ -0,0 +1,162 @@
+"""On-demand profiling of single requests and background stack sampling.
+
+profile_call() runs one function under either cProfile (pstats text) or,
+with fmt='trace', StackProfiler. StackProfiler is a tracer, not a sampler:
+a sys.setprofile hook sees every call and return, so it is exact but slows
+the traced call several times over. Its output is in the collapsed-stack
+format read by flamegraph.pl and speedscope, one frame per 'name (file:line)':
+
+    _convert (main.py:1297);no_tone_id_pipeline (main.py:719) 176
+
+where the number is microseconds spent in that exact stack.
+
+StackSampler is a daemon thread that samples the stacks of every thread in
+the process at a fixed interval and accumulates them in the same format,
+so hot paths under real traffic show up without any request opting in.
+"""
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+
+PROFILE_FORMATS = ('cprofile', 'trace')
+
+
+def _frame_label(code):
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+
+def _builtin_label(func):
+    module = getattr(func, '__module__', None)
+    name = getattr(func, '__qualname__', None) or getattr(func, '__name__', repr(func))
+    return f'{module}.{name}' if module else name
+
+
+def format_collapsed(counts):
+    return ''.join(f'{";".join(stack)} {value}\n' for stack, value in counts.most_common())
+
+
+class StackProfiler:
+    """Exact per-stack timings from tracing every call via sys.setprofile, for one thread."""
+
+    def __init__(self):
+        self.counts = Counter()
+        self._stack = []
+        self._last = 0
+
+    def _callback(self, frame, event, arg):
+        now = time.perf_counter_ns()
+        if self._stack:
+            self.counts[tuple(self._stack)] += now - self._last
+        if event == 'call':
+            self._stack.append(_frame_label(frame.f_code))
+        elif event == 'c_call':
+            self._stack.append(_builtin_label(arg))
+        elif self._stack:
+            # return, c_return, c_exception; returns from frames that were
+            # already running when profiling started have nothing to pop
+            self._stack.pop()
+        self._last = time.perf_counter_ns()
+
+    def run(self, fn, *args):
+        self._last = time.perf_counter_ns()
+        sys.setprofile(self._callback)
+        try:
+            return fn(*args)
+        finally:
+            sys.setprofile(None)
+
+    def collapsed(self):
+        micros = Counter()
+        for stack, nanos in self.counts.items():
+            micros[stack] += nanos // 1000
+        return format_collapsed(+micros)
+
+
+def profile_call(fn, *args, fmt='cprofile', top=40):
+    """Run fn(*args) under a profiler; return (result, profile_text, raw).
+
+    raw is the pstats.Stats object for cprofile and the collapsed text for
+    trace, suitable for writing to disk.
+    """
+    if fmt == 'trace':
+        profiler = StackProfiler()
+        result = profiler.run(fn, *args)
+        text = profiler.collapsed()
+        return result, text, text
+    profiler = cProfile.Profile()
+    result = profiler.runcall(fn, *args)
+    out = io.StringIO()
+    stats = pstats.Stats(profiler, stream=out)
+    stats.sort_stats('cumulative').print_stats(top)
+    return result, out.getvalue(), stats
+
+
+class StackSampler:
+    """Daemon thread sampling every thread's stack each interval seconds.
+
+    At most max_stacks distinct stacks are kept; samples of new stacks past
+    that limit are counted under '(other)'. Threads do not survive fork, so
+    start() must be called in the process that should be sampled.
+    """
+
+    def __init__(self, interval=0.01, max_stacks=20000):
+        self.interval = interval
+        self.max_stacks = max_stacks
+        self.counts = Counter()
+        self.samples = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive() and self._pid == os.getpid()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            frames = sys._current_frames()
+            stacks = []
+            for ident, frame in frames.items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f'thread-{ident}'))
+                stacks.append(tuple(reversed(stack)))
+            del frames
+            with self._lock:
+                self.samples += 1
+                for stack in stacks:
+                    if stack not in self.counts and len(self.counts) >= self.max_stacks:
+                        stack = ('(other)',)
+                    self.counts[stack] += 1
+
+    def collapsed(self):
+        with self._lock:
+            return format_collapsed(self.counts)
+
+    def reset(self):
+        with self._lock:
+            self.counts.clear()
+            self.samples = 0
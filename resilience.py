@@ -0,0 +1,128 @@
+"""Protection for calls to slow or failing upstream services.
+
+CircuitBreaker stops calling an upstream after repeated failures and lets a
+single probe through once reset_timeout has passed. ConcurrencyLimiter caps
+how many upstream calls run at once so a slow upstream cannot tie up every
+worker thread. Both raise UpstreamUnavailable subclasses, which callers turn
+into fast 503 responses.
+"""
+import threading
+import time
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class UpstreamUnavailable(Exception):
+    retry_after = 1
+
+
+class CircuitOpenError(UpstreamUnavailable):
+    def __init__(self, retry_after):
+        super().__init__('Upstream circuit is open')
+        self.retry_after = max(1, int(retry_after + 0.999))
+
+
+class UpstreamBusyError(UpstreamUnavailable):
+    def __init__(self):
+        super().__init__('Too many concurrent upstream requests')
+
+
+class CircuitBreaker:
+    """Closed → open after failure_threshold consecutive failures.
+
+    While open every call is rejected. After reset_timeout seconds the
+    breaker goes half-open and lets one probe through: success closes it,
+    failure opens it again.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+        self.times_opened = 0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go ahead now.
+
+        Returns True when the call is the half-open probe. The caller must
+        then record its outcome or, if it ends some other way, release_probe().
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return False
+            elapsed = time.monotonic() - self.opened_at
+            if self.state == OPEN and elapsed >= self.reset_timeout:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self.rejected += 1
+            raise CircuitOpenError(self.reset_timeout - elapsed if self.state == OPEN else 1)
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def release_probe(self):
+        """Let another probe through after one ended without an outcome."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.times_opened += 1
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.failures,
+                'times_opened': self.times_opened,
+                'rejected': self.rejected,
+            }
+
+
+class ConcurrencyLimiter:
+    """Bounded semaphore that gives up after wait_timeout instead of queueing forever."""
+
+    def __init__(self, limit, wait_timeout=0.5):
+        self.limit = limit
+        self.wait_timeout = wait_timeout
+        self._semaphore = threading.BoundedSemaphore(limit)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.rejected = 0
+
+    def __enter__(self):
+        if not self._semaphore.acquire(timeout=self.wait_timeout):
+            with self._lock:
+                self.rejected += 1
+            raise UpstreamBusyError()
+        with self._lock:
+            self.in_flight += 1
+        return self
+
+    def __exit__(self, *exc):
+        with self._lock:
+            self.in_flight -= 1
+        self._semaphore.release()
+        return False
+
+    def stats(self):
+        with self._lock:
+            return {'limit': self.limit, 'in_flight': self.in_flight, 'rejected': self.rejected}
@@ -0,0 +1,74 @@
+"""convert_batch() and the /convert/batch route."""
+import pytest
+
+import main
+
+
+@pytest.fixture
+def convert_calls(monkeypatch):
+    calls = []
+    convert = main.convert
+
+    def counting_convert(data):
+        calls.append(dict(data))
+        return convert(data)
+
+    monkeypatch.setattr(main, 'convert', counting_convert)
+    return calls
+
+
+def test_results_come_back_in_input_order():
+    texts = ['王', '李白', 'ni hao', '杜甫', '张']
+    assert main.convert_batch(texts) == [main.convert({'text': text}) for text in texts]
+
+
+def test_duplicates_are_converted_once(convert_calls):
+    results = main.convert_batch(['李白', '杜甫', '李白', {'text': '李白'}, ' 李白 '])
+    assert [call['text'] for call in convert_calls] == ['李白', '杜甫']
+    assert results[0] is results[2] is results[3] is results[4]
+
+
+def test_same_text_with_different_options_is_converted_separately(convert_calls):
+    results = main.convert_batch(['李白', {'text': '李白', 'include_tones': True}])
+    assert len(convert_calls) == 2
+    assert results[0] != results[1]
+
+
+def test_defaults_merge_with_item_overrides(convert_calls):
+    main.convert_batch(['李白', {'text': '杜甫', 'include_tones': False}],
+                       {'include_tones': True, 'show_case_suffix': False})
+    assert convert_calls == [
+        {'text': '李白', 'include_tones': True, 'show_case_suffix': False},
+        {'text': '杜甫', 'include_tones': False, 'show_case_suffix': False},
+    ]
+
+
+def test_non_string_non_object_items_get_an_error_in_place():
+    results = main.convert_batch(['王', 3, None, ['李'], '李'])
+    assert results[0] == main.convert({'text': '王'})
+    assert results[1:4] == [{"error": "Each item must be a string or an object"}] * 3
+    assert results[4] == main.convert({'text': '李'})
+
+
+def test_unhashable_options_are_converted_without_dedup(convert_calls):
+    item = {'text': '李', 'geo_target': ['latin']}
+    results = main.convert_batch([item, item])
+    assert len(convert_calls) == 2
+    assert results == [main.convert(item)] * 2
+
+
+def test_route_answers_results_and_validates_items():
+    client = main.app.test_client()
+    response = client.post('/convert/batch', json={'items': ['李', '王'], 'include_tones': True})
+    assert response.status_code == 200
+    assert response.json['results'] == [main.convert({'text': t, 'include_tones': True}) for t in '李王']
+    assert client.post('/convert/batch', json={'items': '李'}).status_code == 400
+
+
+def test_route_rejects_too_many_items(monkeypatch, convert_calls):
+    monkeypatch.setattr(main, 'MAX_BATCH_ITEMS', 3)
+    client = main.app.test_client()
+    response = client.post('/convert/batch', json={'items': ['李'] * 4})
+    assert response.status_code == 413
+    assert convert_calls == []
+    assert client.post('/convert/batch', json={'items': ['李'] * 3}).status_code == 200
@@ -0,0 +1,239 @@
+"""/convert-english against a local http.server stand-in for the upstream API.
+
+Covers the fan-out (result order, partial results at the deadline), the
+circuit breaker, request coalescing and the ASGI twin of the route.
+"""
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+import pytest
+
+import asgi
+import main
+from resilience import CircuitBreaker
+
+
+class Upstream:
+    """Scripted upstream: per-word suggestions, delays and failures."""
+
+    def __init__(self):
+        self.suggestions = {}
+        self.delays = {}
+        self.failing = set()
+        self.calls = {'suggestions': 0, 'transliterate': 0}
+        self.lock = threading.Lock()
+
+
+def make_handler(upstream):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def reply(self, body, status=200):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            word = parse_qs(urlparse(self.path).query)['q'][0]
+            with upstream.lock:
+                upstream.calls['suggestions'] += 1
+            if word in upstream.failing:
+                return self.reply({}, 500)
+            words = upstream.suggestions.get(word, [])
+            self.reply({'success': True, 'data': {'suggestions': [
+                {'word': w, 'relevance': 250, 'source': 'stub'} for w in words
+            ]}})
+
+        def do_POST(self):
+            word = json.loads(self.rfile.read(int(self.headers['Content-Length'])))['word']
+            with upstream.lock:
+                upstream.calls['transliterate'] += 1
+            time.sleep(upstream.delays.get(word, 0))
+            if word in upstream.failing:
+                return self.reply({}, 500)
+            self.reply({'success': True, 'data': {'transliteration': f'ka-{word}', 'confidence': 1}})
+
+    return Handler
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    upstream = Upstream()
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(upstream))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(main, 'ENGLISH_API_URL', f'http://127.0.0.1:{server.server_port}/')
+    monkeypatch.setattr(main, 'upstream_breaker', CircuitBreaker(failure_threshold=2, reset_timeout=0.3))
+    main.suggestions_cache.clear()
+    main.transliteration_cache.clear()
+    yield upstream
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client():
+    return main.app.test_client()
+
+
+def post_english(client, word):
+    return client.post('/convert-english', json={'word': word})
+
+
+def test_results_keep_suggestion_order(upstream, client):
+    upstream.suggestions['ship'] = ['ship', 'shop', 'shape', 'sheep']
+    # Later suggestions finish first
+    upstream.delays.update({'ship': 0.3, 'shop': 0.2, 'shape': 0.1})
+    response = post_english(client, 'ship')
+    assert response.status_code == 200
+    assert [r['word'] for r in response.json['results']] == ['ship', 'shop', 'shape', 'sheep']
+    assert response.json['partial'] is False
+
+
+def test_slow_transliteration_is_dropped_at_deadline(upstream, client, monkeypatch):
+    monkeypatch.setattr(main, 'ENGLISH_REQUEST_DEADLINE', 0.5)
+    upstream.suggestions['cat'] = ['cat', 'cart', 'coat']
+    upstream.delays['cart'] = 1.5
+    started = time.monotonic()
+    response = post_english(client, 'cat')
+    assert time.monotonic() - started < 1.2
+    assert response.status_code == 200
+    assert [r['word'] for r in response.json['results']] == ['cat', 'coat']
+    assert response.json['partial'] is True
+
+
+def test_breaker_opens_half_opens_and_closes(upstream, client):
+    upstream.failing.add('down')
+    upstream.suggestions['up'] = ['up']
+    breaker = main.upstream_breaker
+
+    assert post_english(client, 'down').status_code == 500
+    assert post_english(client, 'down').status_code == 500
+    assert breaker.state == 'open'
+
+    calls = upstream.calls['suggestions']
+    response = post_english(client, 'up')
+    assert response.status_code == 503
+    assert int(response.headers['Retry-After']) >= 0
+    assert upstream.calls['suggestions'] == calls  # rejected without calling upstream
+
+    time.sleep(0.35)
+    # The first call after reset_timeout is the half-open probe; its success closes the breaker
+    response = post_english(client, 'up')
+    assert response.status_code == 200
+    assert breaker.state == 'closed'
+    assert breaker.stats()['times_opened'] == 1
+
+
+def half_open_breaker():
+    breaker = main.upstream_breaker
+    breaker.record_failure()
+    breaker.record_failure()
+    time.sleep(0.35)
+    return breaker
+
+
+@pytest.mark.parametrize('error', [ValueError('bad json'), httpx.InvalidURL('bad url')])
+def test_probe_ending_in_unexpected_error_is_released(upstream, error):
+    breaker = half_open_breaker()
+
+    def send():
+        raise error
+
+    with pytest.raises(type(error)):
+        main._guarded_upstream(send)
+    assert breaker.before_call() is True  # the next call becomes the probe
+
+
+def test_asgi_probe_is_released_on_cancellation(upstream):
+    breaker = half_open_breaker()
+
+    async def go():
+        asgi._state['semaphore'] = asyncio.Semaphore(1)
+        asgi._state['in_flight'] = 0
+
+        async def request():
+            await asyncio.sleep(10)
+
+        task = asyncio.ensure_future(asgi._guarded_upstream(request))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        asgi._state['semaphore'] = None
+
+    asyncio.run(go())
+    assert breaker.stats()['consecutive_failures'] == 2  # a shutdown is not an upstream failure
+    assert breaker.before_call() is True
+
+
+def test_open_breaker_with_cached_suggestions_answers_503(upstream, client):
+    upstream.suggestions['dogs'] = ['dog', 'dot']
+    upstream.failing.update({'dog', 'dot'})
+    post_english(client, 'dogs')  # caches the suggestions, opens the breaker
+    assert main.upstream_breaker.state == 'open'
+    response = post_english(client, 'dogs')
+    assert response.status_code == 503
+    assert 'Retry-After' in response.headers
+
+
+def test_concurrent_requests_share_upstream_calls(upstream):
+    upstream.suggestions['tree'] = ['tree', 'three']
+    upstream.delays.update({'tree': 0.3, 'three': 0.3})
+
+    def call(_):
+        return post_english(main.app.test_client(), 'tree').status_code
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        statuses = list(pool.map(call, range(8)))
+    assert statuses == [200] * 8
+    assert upstream.calls == {'suggestions': 1, 'transliterate': 2}
+
+
+def run_asgi(requests):
+    """Send (word, ...) requests concurrently through the ASGI app."""
+    async def go():
+        transport = httpx.ASGITransport(app=asgi.app)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url='http://asgi') as http:
+                return await asyncio.gather(*[http.post('/convert-english', json={'word': w}) for w in requests])
+        finally:
+            # The upstream client is bound to this event loop
+            await asgi._state['client'].aclose()
+            asgi._state['client'] = None
+            asgi._state['semaphore'] = None
+    return asyncio.run(go())
+
+
+def test_asgi_route_matches_flask(upstream, monkeypatch):
+    monkeypatch.setattr(main, 'ENGLISH_REQUEST_DEADLINE', 0.5)
+    upstream.suggestions['sun'] = ['sun', 'son', 'sin']
+    upstream.delays.update({'sun': 0.2, 'son': 1.5, 'sin': 0.3})
+    responses = run_asgi(['sun'] * 4)
+    for response in responses:
+        assert response.status_code == 200
+        assert [r['word'] for r in response.json()['results']] == ['sun', 'sin']
+        assert response.json()['partial'] is True
+    assert upstream.calls['suggestions'] == 1
+
+
+def test_asgi_breaker_rejection_answers_503(upstream):
+    upstream.suggestions['moons'] = ['moon', 'mood']
+    upstream.failing.update({'moon', 'mood'})
+    run_asgi(['moons'])
+    assert main.upstream_breaker.state == 'open'
+    response, = run_asgi(['moons'])
+    assert response.status_code == 503
+    assert 'retry-after' in response.headers
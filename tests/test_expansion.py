@@ -0,0 +1,59 @@
+"""Bounded heteronym expansion: ranking order and cost on long inputs."""
+import itertools
+import time
+import tracemalloc
+
+import pytest
+
+import main
+
+
+def brute_force_ranked(readings):
+    combos = itertools.product(*[range(len(options)) for options in readings])
+    for indices in sorted(combos, key=lambda indices: (sum(indices), indices)):
+        yield tuple(options[i] for options, i in zip(readings, indices))
+
+
+def test_ranked_combinations_are_rank_then_lexicographic():
+    readings = [('a', 'b'), ('c',), ('d', 'e', 'f'), ('g', 'h'), ('i',)]
+    assert list(main.iter_ranked_combinations(readings)) == list(brute_force_ranked(readings))
+
+
+def test_ranked_combinations_handle_degenerate_readings():
+    assert list(main.iter_ranked_combinations([])) == [()]
+    assert list(main.iter_ranked_combinations([('a',), ('b',)])) == [('a', 'b')]
+    assert list(main.iter_ranked_combinations([('a',), ()])) == []
+
+
+def test_long_input_gets_a_smaller_variant_budget():
+    readings = [('a', 'b')] * 2000
+    budget = main.variant_budget(readings, main.MAX_VARIANTS_LIMIT)
+    assert budget * len(readings) <= main.MAX_EXPANDED_SYLLABLES
+    assert main.variant_budget(readings[:4], main.MAX_VARIANTS_LIMIT) == main.MAX_VARIANTS_LIMIT
+    assert len(list(main.iter_reading_combinations(readings, main.MAX_VARIANTS_LIMIT))) == budget
+
+
+def test_long_polyphonic_input_is_bounded_in_time_and_memory():
+    text = '长行重乐还朝都觉和着' * 40
+    main._convert({'text': '长'})  # load the reading caches outside the measurement
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        result = main._convert({'text': text, 'max_variants': main.MAX_VARIANTS_LIMIT})
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    fields = result['ქართული']
+    assert fields['truncated'] is True
+    assert 1 + len(fields['other_georgian']) <= main.MAX_EXPANDED_SYLLABLES // len(text)
+    assert elapsed < 5
+    assert peak < 64 * 2 ** 20
+
+
+@pytest.mark.skipif(main.POLYPHONIC_INDEX is None, reason='polyphonic_index.bin is not built')
+def test_ranking_applies_position_by_position_in_mixed_input():
+    chinese = main.rank_readings('长行', main.text_readings('长行'))
+    mixed = main.rank_readings('ab长行 x', main.text_readings('ab长行 x'))
+    assert main.reading_characters('ab长行 x') == [None, '长', '行', None]
+    assert mixed[1:3] == chinese
@@ -0,0 +1,107 @@
+"""/convert/incremental sessions: edits, diffs, resync and error paths."""
+import time
+
+import pytest
+
+import main
+from cache import TTLCache
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, 'incremental_sessions', TTLCache(maxsize=100, ttl=60))
+    return main.app.test_client()
+
+
+def post(client, **body):
+    return client.post('/convert/incremental', json=body)
+
+
+def start(client, text, **options):
+    response = post(client, text=text, **options)
+    assert response.status_code == 200
+    return response.json
+
+
+def test_start_returns_full_result_and_session(client):
+    body = start(client, '李')
+    assert body['version'] == 0
+    assert body['result'] == main.convert({'text': '李'})
+    assert body['session']
+
+
+def test_delta_returns_only_changed_fields(client):
+    body = start(client, '李')
+    response = post(client, session=body['session'], version=0, delta={'start': 1, 'insert': '白'})
+    assert response.status_code == 200
+    assert response.json['version'] == 1
+    changes = response.json['changes']['ქართული']
+    assert changes['pinyin'] == main.convert({'text': '李白'})['ქართული']['pinyin']
+    assert 'truncated' not in changes  # unchanged fields are left out
+
+
+def test_whitespace_only_edit_has_no_changes(client):
+    body = start(client, '李白')
+    response = post(client, session=body['session'], version=0, delta={'start': 2, 'insert': ' '})
+    assert response.json['changes'] == {'ქართული': {}}
+
+
+def test_changed_list_keeping_its_first_item_is_sent_as_a_diff():
+    old = {'k': {'other': ['a', 'b', 'c']}}
+    new = {'k': {'other': ['a', 'b', 'd', 'e']}}
+    assert main.diff_result(old, new) == {'k': {'other': {'keep': 2, 'append': ['d', 'e']}}}
+    assert main.diff_result(old, {'k': {'other': ['x']}}) == {'k': {'other': ['x']}}
+
+
+def test_fields_limit_result_and_changes(client):
+    body = start(client, '李', fields=['pinyin'])
+    assert body['result'] == {'ქართული': {'pinyin': 'li'}}
+    response = post(client, session=body['session'], version=0, fields=['pinyin'], delta={'start': 1, 'insert': '白'})
+    assert response.json['changes'] == {'ქართული': {'pinyin': 'li bai'}}
+
+
+@pytest.mark.parametrize('body', [
+    {},
+    {'text': '李', 'fields': 'pinyin'},
+    {'text': '李', 'fields': [1]},
+])
+def test_bad_requests_answer_400(client, body):
+    assert post(client, **body).status_code == 400
+
+
+@pytest.mark.parametrize('delta', [
+    {'start': 5, 'insert': 'x'},
+    {'start': 1, 'end': 0, 'insert': 'x'},
+    {'start': '0', 'insert': 'x'},
+    {'start': 0, 'insert': 3},
+    'not a delta',
+])
+def test_invalid_delta_answers_400_with_resync(client, delta):
+    body = start(client, '李')
+    response = post(client, session=body['session'], version=0, delta=delta)
+    assert response.status_code == 400
+    assert response.json['resync'] is True
+
+
+def test_unknown_session_answers_409(client):
+    response = post(client, session='missing', version=0, delta={'start': 0, 'insert': '李'})
+    assert response.status_code == 409
+    assert response.json['resync'] is True
+
+
+def test_version_mismatch_answers_409(client):
+    body = start(client, '李')
+    response = post(client, session=body['session'], version=3, delta={'start': 1, 'insert': '白'})
+    assert response.status_code == 409
+    assert response.json['resync'] is True
+
+
+def test_expired_session_answers_409_and_resync_starts_over(client, monkeypatch):
+    monkeypatch.setattr(main, 'incremental_sessions', TTLCache(maxsize=100, ttl=0.05))
+    body = start(client, '李')
+    time.sleep(0.1)
+    response = post(client, session=body['session'], version=0, delta={'start': 1, 'insert': '白'})
+    assert response.status_code == 409
+    resynced = start(client, '李白')
+    assert resynced['version'] == 0
+    assert resynced['session'] != body['session']
@@ -0,0 +1,32 @@
+"""Per-request profiles and the PROFILE_DIR/PROFILE_TOKEN startup check."""
+import os
+import re
+import subprocess
+import sys
+
+import main
+from profiling import profile_call
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_trace_profile_is_collapsed_stacks_of_labelled_frames():
+    result, text, raw = profile_call(main._convert, {'text': '李白'}, fmt='trace')
+    assert result == main._convert({'text': '李白'})
+    assert text == raw
+    frame = r'[^;]+'
+    for line in text.splitlines():
+        assert re.fullmatch(rf'{frame}(;{frame})* \d+', line)
+    assert text.startswith('_convert (main.py:')
+
+
+def test_unknown_profile_format_is_refused():
+    assert main.check_profile_access('collapsed', '')[1] == 400
+
+
+def test_profile_dir_without_token_refuses_to_start(tmp_path):
+    env = dict(os.environ, PROFILE_DIR=str(tmp_path), PROFILE_TOKEN='')
+    started = subprocess.run([sys.executable, '-c', 'import main'], cwd=REPO_DIR, env=env,
+                             capture_output=True, text=True)
+    assert started.returncode != 0
+    assert 'PROFILE_TOKEN' in started.stderr
@@ -0,0 +1,83 @@
+"""convert()'s result cache: key normalization, invalidation and size limits."""
+import os
+
+import pytest
+
+import main
+from cache import ResultCache
+
+
+@pytest.fixture
+def convert_calls(monkeypatch):
+    monkeypatch.setattr(main, 'result_cache', ResultCache(maxsize=100))
+    calls = []
+    convert = main._convert
+
+    def counting_convert(data):
+        calls.append(data.get('text'))
+        return convert(data)
+
+    monkeypatch.setattr(main, '_convert', counting_convert)
+    return calls
+
+
+@pytest.mark.parametrize('a, b', [
+    ({'text': '李白'}, {'text': '  李白\n'}),
+    ({'text': '李白'}, {'text': '李白', 'include_tones': False, 'show_case_suffix': True}),
+    ({'text': '李白', 'include_tones': 1}, {'text': '李白', 'include_tones': True}),
+    ({'text': '李白', 'use_apostrophes': ''}, {'text': '李白', 'use_apostrophes': False}),
+    ({'text': '李白', 'fields': ['pinyin']}, {'text': '李白'}),
+])
+def test_equivalent_requests_share_a_key(a, b):
+    assert main.conversion_key(a) == main.conversion_key(b)
+
+
+@pytest.mark.parametrize('other', [
+    {'text': '李'},
+    {'text': '李白', 'include_tones': True},
+    {'text': '李白', 'show_case_suffix': False},
+    {'text': '李白', 'input_language': 'georgian'},
+    {'text': '李白', 'max_variants': 8},
+])
+def test_output_affecting_options_change_the_key(other):
+    assert main.conversion_key({'text': '李白'}) != main.conversion_key(other)
+
+
+def test_repeat_is_served_from_cache(convert_calls):
+    first = main.convert({'text': '李白'})
+    assert main.convert({'text': ' 李白 ', 'include_tones': 0}) is first
+    assert convert_calls == ['李白']
+
+
+def test_special_case_reload_invalidates_cached_results(convert_calls, monkeypatch, tmp_path):
+    path = tmp_path / 'special_cases.csv'
+    path.write_text('hanzi,georgian\n北京,პეკინი\n', encoding='utf-8')
+    os.utime(path, (1, 1))
+    monkeypatch.setattr(main, 'SPECIAL_CASES_PATH', str(path))
+    monkeypatch.setattr(main, 'SPECIAL_CASE_INDEX', main.SPECIAL_CASE_INDEX)
+    assert main.reload_special_cases(force=True)
+
+    assert 'special' not in main.convert({'text': '李白'})
+    path.write_text('hanzi,georgian\n北京,პეკინი\n李白,ლი ბო\n', encoding='utf-8')
+    os.utime(path, (2, 2))
+    assert main.reload_special_cases()
+
+    assert main.convert({'text': '李白'})['special']['ქართული'] == 'ლი ბო'
+    assert convert_calls == ['李白', '李白']
+
+
+def test_long_text_bypasses_the_cache(convert_calls, monkeypatch):
+    monkeypatch.setattr(main, 'MAX_CACHED_TEXT_LENGTH', 4)
+    main.convert({'text': '李白杜甫王'})
+    main.convert({'text': '李白杜甫王'})
+    assert convert_calls == ['李白杜甫王', '李白杜甫王']
+    assert len(main.result_cache._data) == 0
+
+
+def test_long_runs_bypass_the_segment_caches(monkeypatch):
+    monkeypatch.setattr(main, 'MAX_CACHED_TEXT_LENGTH', 4)
+    main.segment_run.cache_clear()
+    main.segment_readings.cache_clear()
+    expected = main.text_readings('李白杜甫王维')
+    assert main.text_readings('李白杜甫王维x') == expected + [('x',)]
+    assert main.segment_run.cache_info().currsize == 1  # only the short 'x' run
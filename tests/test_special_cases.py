@@ -0,0 +1,114 @@
+"""Special-case phrases: whole-input matches and matches inside longer text."""
+import os
+
+import pytest
+
+import main
+from cache import ResultCache
+
+PHRASES = ['北京', '孔子', '乌鲁木齐', '成龙', '成吉思汗', '王']
+
+
+@pytest.fixture
+def trie():
+    return main.build_phrase_trie(PHRASES)
+
+
+@pytest.fixture
+def special_cases(monkeypatch):
+    """Serve PHRASES (with made-up names) as the special-case table."""
+    index = main.build_special_case_index({phrase: f'name-{phrase}' for phrase in PHRASES})
+    # Same version as the live table, so the reload watcher leaves this one in place
+    monkeypatch.setattr(main, 'SPECIAL_CASE_INDEX', dict(index, version=main.get_special_case_index()['version']))
+    monkeypatch.setattr(main, '_special_cases_watcher_pid', os.getpid())
+    monkeypatch.setattr(main, 'result_cache', ResultCache(maxsize=0))
+
+
+@pytest.mark.parametrize('text, segments', [
+    ('北京大学', [('北京', '北京'), ('大学', None)]),
+    ('孔子学院', [('孔子', '孔子'), ('学院', None)]),
+    ('乌鲁木齐市', [('乌鲁木齐', '乌鲁木齐'), ('市', None)]),
+    ('成龙成龙', [('成龙', '成龙'), ('成龙', '成龙')]),
+    ('我爱北京和乌鲁木齐', [('我爱', None), ('北京', '北京'), ('和', None), ('乌鲁木齐', '乌鲁木齐')]),
+    ('上海大学', [('上海大学', None)]),
+    ('', []),
+])
+def test_embedded_phrases_are_split_out(trie, text, segments):
+    assert main.segment_special_cases(text, trie) == segments
+
+
+def test_longest_match_wins(trie):
+    assert main.segment_special_cases('成吉思汗陵', trie) == [('成吉思汗', '成吉思汗'), ('陵', None)]
+    assert main.segment_special_cases('成吉思', trie) == [('成吉思', None)]
+    longer = main.build_phrase_trie(['北京', '北京大学'])
+    assert main.segment_special_cases('北京大学生', longer) == [('北京大学', '北京大学'), ('生', None)]
+
+
+def test_phrases_below_min_length_are_not_embedded(trie, monkeypatch):
+    assert main.segment_special_cases('王小明', trie) == [('王小明', None)]
+    monkeypatch.setattr(main, 'MIN_EMBEDDED_PHRASE_LENGTH', 3)
+    shorter = main.build_phrase_trie(PHRASES)
+    assert main.segment_special_cases('北京乌鲁木齐', shorter) == [('北京', None), ('乌鲁木齐', '乌鲁木齐')]
+
+
+def test_short_phrase_still_matches_the_whole_input(special_cases):
+    assert main.convert({'text': '王'})['special']['ქართული'] == 'name-王'
+    assert 'special' not in main.convert({'text': '王小明'})
+
+
+def test_embedded_match_uses_the_special_name_and_keeps_the_rest(special_cases):
+    fields = main.convert({'text': '北京大学'})['special']
+    assert fields['ქართული'].startswith('name-北京 ')
+    assert [(s['text'], s['special']) for s in fields['segments']] == [('北京', True), ('大学', False)]
+
+
+@pytest.fixture
+def table_file(monkeypatch, tmp_path):
+    """A special-case file of our own, loaded as the live table."""
+    path = tmp_path / 'special_cases.csv'
+    path.write_text('hanzi,georgian\n北京,პეკინი\n', encoding='utf-8')
+    monkeypatch.setattr(main, 'SPECIAL_CASES_PATH', str(path))
+    monkeypatch.setattr(main, 'SPECIAL_CASE_INDEX', main.SPECIAL_CASE_INDEX)
+    monkeypatch.setattr(main, 'special_cases_reloads', dict(main.special_cases_reloads, errors=0,
+                                                            last_error=None, rejected_version=None))
+    assert main.reload_special_cases(force=True)
+    return path
+
+
+def replace_file(path, text, mtime):
+    path.write_text(text, encoding='utf-8')
+    os.utime(path, (mtime, mtime))
+
+
+def test_rejected_reload_is_reported_and_not_retried(table_file):
+    replace_file(table_file, '', 100)
+    assert not main.reload_special_cases()
+    stats = main.app.test_client().get('/convert/cache').json['special_cases']
+    assert stats['rejected'] is True
+    assert stats['errors'] == 1
+    assert 'empty table' in stats['last_error']
+    assert stats['entries'] == 1  # the old table stays live
+
+    assert not main.reload_special_cases()  # same file: not read again
+    assert main.special_cases_stats()['errors'] == 1
+
+    replace_file(table_file, 'hanzi,georgian\n北京,პეკინი\n南京,ნანკინი\n', 200)
+    assert main.reload_special_cases()
+    stats = main.special_cases_stats()
+    assert (stats['rejected'], stats['entries'], stats['errors']) == (False, 2, 1)
+
+
+def test_file_changing_while_read_is_rejected(table_file, monkeypatch):
+    replace_file(table_file, 'hanzi,georgian\n北京,პეკინი\n南京,ნანკინი\n', 100)
+    load = main.load_special_cases
+
+    def load_while_writing(path):
+        special_cases = load(path)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write('香港,ჰონგკონგი\n')
+        return special_cases
+
+    monkeypatch.setattr(main, 'load_special_cases', load_while_writing)
+    assert not main.reload_special_cases()
+    assert 'changed while it was read' in main.special_cases_stats()['last_error']
+    assert main.special_cases_stats()['entries'] == 1
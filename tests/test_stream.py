@@ -0,0 +1,41 @@
+"""/convert/stream on the ASGI app: one NDJSON record per line, errors included."""
+import asyncio
+import json
+
+import httpx
+
+import asgi
+import main
+
+
+def stream(body, params=None):
+    async def go():
+        transport = httpx.ASGITransport(app=asgi.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://asgi') as http:
+            return await http.post('/convert/stream', content=body, params=params)
+    response = asyncio.run(go())
+    return response, [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_each_line_gets_a_record_in_order():
+    response, records = stream('李白\n\n杜甫\n{"text": "王"}'.encode())
+    assert response.status_code == 200
+    assert [r['text'] for r in records] == ['李白', '杜甫', '王']
+    assert records[0]['result'] == main.convert({'text': '李白'})
+
+
+def test_failing_line_becomes_an_error_record(monkeypatch):
+    convert = main.convert
+
+    def flaky_convert(data):
+        if data['text'] == '杜甫':
+            raise RuntimeError('boom')
+        return convert(data)
+
+    monkeypatch.setattr(main, 'convert', flaky_convert)
+    response, records = stream('李白\n杜甫\n{bad json\n王'.encode())
+    assert response.status_code == 200
+    assert records[0]['text'] == '李白'
+    assert records[1] == {'error': 'boom'}
+    assert records[2]['error'].startswith('Invalid JSON line')
+    assert records[3]['text'] == '王'
@@ -0,0 +1,375 @@
+"""Golden-corpus check that every optimized conversion path matches the reference.
+
+The reference is the baseline rule-by-rule pipeline: main._convert() with
+the syllable-id expansion switched off and map_pinyin_to_georgian() replaced
+by a copy of the original, which runs the Georgian replacement rules on
+every syllable of every variant. Every path the service uses is run over
+the same corpus; its output must serialize to exactly the same bytes, and
+its speedup is measured against the reference:
+
+    table       main._convert(): the syllable table and id expansion, no result cache
+    cached      convert() through the result cache, cold and then warm
+    batched     convert_batch() with the whole corpus in one call
+    streamed    iter_convert_lines(), as used by /convert/stream and bulk.py
+    parallel    bulk.iter_convert_parallel() over a process pool
+    tables      the syllable-id expansion and the precomputed syllable→Georgian
+                table against the string pipeline and the baseline rules
+
+The corpus is surnames.txt, datasur.txt and the polyphonic_full.csv
+characters, in the default, include_tones and no-case-suffix modes.
+
+The reference itself is checked against verify_golden.jsonl.gz, the output
+of a known-good revision (recorded in the file's first line), so a change
+that alters the reference and every path with it still fails. Regenerate it
+only for a deliberate output change, and commit it with that change:
+
+    python verify.py --write-golden
+
+surnames.txt also carries expected Georgian readings. The dictionaries may
+read a few surnames differently, so the run only fails when fewer than
+--min-coverage of them (default ORACLE_FLOOR, today's count) are produced.
+
+    python verify.py
+    python verify.py --workers 4 --limit 500 --json verify.json
+    python verify.py --min-speedup 1.5 --min-speedup warm=20
+
+Exits with status 1 if any path differs from the reference or the golden
+output, coverage drops below the floor, or a path misses its --min-speedup.
+"""
+import argparse
+import contextlib
+import csv
+import gzip
+import io
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+import main
+from bulk import iter_convert_parallel
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+GOLDEN_PATH = os.path.join(BASE_DIR, 'verify_golden.jsonl.gz')
+# Surnames whose expected readings were all produced when the floor was set
+ORACLE_FLOOR = 1679
+
+MODES = {
+    'default': {},
+    'tones': {'include_tones': True},
+    'no_case_suffix': {'show_case_suffix': False},
+}
+
+
+# ---------------- Corpus ----------------
+def load_surnames():
+    """(hanzi, [expected Georgian readings]) pairs from surnames.txt."""
+    pairs = []
+    with open(os.path.join(BASE_DIR, 'surnames.txt'), 'r', encoding='utf-8-sig') as f:
+        for line in f:
+            if '=>' not in line:
+                continue
+            hanzi, georgian = (part.strip() for part in line.split('=>', 1))
+            pairs.append((hanzi, [g.strip() for g in georgian.split(',') if g.strip()]))
+    return pairs
+
+
+def load_corpus(limit=None):
+    texts = [hanzi for hanzi, _ in load_surnames()]
+    with open(os.path.join(BASE_DIR, 'datasur.txt'), 'r', encoding='utf-8-sig') as f:
+        texts.extend(line.strip() for line in f if line.strip())
+    with open(os.path.join(BASE_DIR, 'polyphonic_full.csv'), 'r', encoding='utf-8-sig') as f:
+        texts.extend(row['char_simpl'] for row in csv.DictReader(f))
+    texts = list(dict.fromkeys(texts))
+    return texts[:limit] if limit else texts
+
+
+def encode(result):
+    return json.dumps(result, ensure_ascii=False, sort_keys=True)
+
+
+# ---------------- Golden output ----------------
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_golden(texts, path=GOLDEN_PATH):
+    """Write the reference output of every mode; mtime=0 keeps the file reproducible."""
+    with open(path, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as gz, \
+            io.TextIOWrapper(gz, encoding='utf-8', newline='\n') as f:
+        f.write(json.dumps({'revision': git_revision(), 'inputs': len(texts)}) + '\n')
+        for mode in sorted(MODES):
+            for text, result in zip(texts, run_reference(texts, MODES[mode])):
+                f.write(json.dumps([mode, text, result], ensure_ascii=False, sort_keys=True) + '\n')
+    return path
+
+
+def load_golden(path=GOLDEN_PATH):
+    """Return (header, {mode: {text: encoded result}}), or (None, {}) if missing."""
+    try:
+        f = gzip.open(path, 'rt', encoding='utf-8')
+    except FileNotFoundError:
+        return None, {}
+    golden = {}
+    with f:
+        header = json.loads(f.readline())
+        for line in f:
+            mode, text, result = json.loads(line)
+            golden.setdefault(mode, {})[text] = encode(result)
+    return header, golden
+
+
+# ---------------- Baseline rules ----------------
+# The rule-by-rule Georgian mapping as it was before the syllable table, with
+# its patterns rebuilt on every call, so the reference keeps its original cost.
+def baseline_get_georgian(pinyin_list):
+    if not pinyin_list:
+        return {}
+
+    all_result = {}
+    for pinyin in pinyin_list:
+        replacements_long = main.GEORGIAN_REPLACEMENTS_LONG
+        pattern = '|'.join(re.escape(char) for char in replacements_long.keys())
+        text_long = re.sub(pattern, lambda match: replacements_long[match.group()], pinyin)
+
+        text_long = re.sub(r'(?<=[jqxy])u', 'iu', text_long)
+        if 'iuan' in text_long and 'g' not in text_long[text_long.index('iuan')+3:]:
+            text_long = text_long.replace('iuan', 'iuen')
+        if 'ian' in text_long:
+            text_long = text_long.replace('ian', 'ien')
+
+        replacements_short = main.GEORGIAN_REPLACEMENTS_SHORT
+        pattern_short = '|'.join(re.escape(char) for char in replacements_short.keys())
+        text_short = re.sub(pattern_short, lambda match: replacements_short[match.group()], text_long)
+
+        text_short = text_short.replace(' ', '')
+        pinyin_clean = pinyin.replace(' ', '')
+
+        all_result[pinyin_clean] = text_short
+
+    return all_result
+
+
+def baseline_map_pinyin_to_georgian(pinyin_str):
+    syllables = pinyin_str.strip().split()
+    plain_syllables = [main.remove_pinyin_tone_marks(s) for s in syllables]
+    plain_syllables = [s.lower() for s in plain_syllables]
+    plain_syllables = [s.replace('v', 'ü') for s in plain_syllables]
+    georgian_syllables = [baseline_get_georgian([s]).get(s, '') for s in plain_syllables]
+    return ' '.join(georgian_syllables).strip()
+
+
+@contextlib.contextmanager
+def baseline_pipeline():
+    """Run main._convert() without the syllable table or the id expansion."""
+    saved = main.map_pinyin_to_georgian, main.no_tone_id_pipeline
+    main.map_pinyin_to_georgian = baseline_map_pinyin_to_georgian
+    main.no_tone_id_pipeline = lambda *args, **kwargs: None
+    try:
+        yield
+    finally:
+        main.map_pinyin_to_georgian, main.no_tone_id_pipeline = saved
+
+
+# ---------------- Paths ----------------
+def timed(fn):
+    start = time.perf_counter()
+    value = fn()
+    return value, time.perf_counter() - start
+
+
+def run_reference(texts, options):
+    with baseline_pipeline():
+        return [main._convert(dict(options, text=text)) for text in texts]
+
+
+def run_table(texts, options):
+    return [main._convert(dict(options, text=text)) for text in texts]
+
+
+def run_cached(texts, options):
+    return [main.convert(dict(options, text=text)) for text in texts]
+
+
+def run_batched(texts, options):
+    return main.convert_batch(texts, options)
+
+
+def run_streamed(texts, options):
+    return ''.join(main.iter_convert_lines((text + '\n' for text in texts), options, 'text'))
+
+
+def run_parallel(texts, options, workers):
+    return ''.join(iter_convert_parallel((text + '\n' for text in texts), options, 'text', workers=workers))
+
+
+def decode_lines(output):
+    return [json.loads(line)['result'] for line in output.splitlines()]
+
+
+def check_syllable_table():
+    """Syllables whose table entry differs from the baseline Georgian rules."""
+    return [s for s, georgian in main.GEORGIAN_SYLLABLE_TABLE.items() if georgian != baseline_get_georgian([s])[s]]
+
+
+def check_id_pipeline(texts):
+    """Chinese inputs where the syllable-id expansion differs from the string pipeline."""
+    mismatches = []
+    for text in texts:
+        if not main.contains_cjk(text):
+            continue
+        variants, _ = main.iter_professional_pinyin(text, False, main.DEFAULT_MAX_VARIANTS)
+        umlaut = main.has_umlaut_reading(text)
+        expected = main.no_tone_variant_pipeline(variants, umlaut=umlaut)
+        readings, _ = main.bounded_readings(text, False, main.DEFAULT_MAX_VARIANTS)
+        actual = main.no_tone_id_pipeline(readings, main.DEFAULT_MAX_VARIANTS, umlaut=umlaut)
+        if actual is not None and actual != expected:
+            mismatches.append(text)
+    return mismatches
+
+
+def first_differences(texts, expected, actual, n=5):
+    if len(expected) != len(actual):
+        return [f'{len(actual)} results for {len(expected)} inputs']
+    return [text for text, a, b in zip(texts, expected, actual) if a != b][:n]
+
+
+def check_oracle():
+    """Count surnames whose expected readings all appear among the produced variants."""
+    covered, missing = 0, []
+    for hanzi, expected in load_surnames():
+        result = main._convert({'text': hanzi, 'show_case_suffix': False})
+        fields = next(iter(result.values()))
+        produced = {fields.get('ქართული') or fields.get('georgian')}
+        produced.update(fields.get('other_georgian') or [])
+        if set(expected) <= produced:
+            covered += 1
+        else:
+            missing.append(hanzi)
+    return covered, missing
+
+
+# ---------------- Report ----------------
+def parse_speedup(value):
+    """'X' (the table path) or 'PATH=X' → (path, X)."""
+    path, _, ratio = value.rpartition('=')
+    return path or 'table', float(ratio)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Check optimized conversion paths against the reference output.')
+    parser.add_argument('--workers', type=int, default=2, help='processes for the parallel path (default 2)')
+    parser.add_argument('--limit', type=int, help='only use the first N corpus entries')
+    parser.add_argument('--mode', choices=sorted(MODES), action='append', help='modes to check (default all)')
+    parser.add_argument('--json', metavar='PATH', help='also write the report as JSON')
+    parser.add_argument('--min-coverage', type=int, default=ORACLE_FLOOR,
+                        help=f'fail below this many covered surnames (default {ORACLE_FLOOR})')
+    parser.add_argument('--min-speedup', type=parse_speedup, action='append', default=[], metavar='[PATH=]X',
+                        help='fail if PATH (default table) is not X times faster than the reference; repeatable')
+    parser.add_argument('--write-golden', action='store_true', help=f'regenerate {os.path.basename(GOLDEN_PATH)}')
+    return parser
+
+
+def main_cli(argv=None):
+    args = build_parser().parse_args(argv)
+    texts = load_corpus(args.limit)
+    if args.write_golden:
+        if args.limit:
+            print('--write-golden needs the whole corpus; drop --limit', file=sys.stderr)
+            return 2
+        print(f'Wrote {write_golden(texts)}', file=sys.stderr)
+        return 0
+    golden_header, golden = load_golden()
+    min_speedups = dict(args.min_speedup)
+    # Let the whole corpus fit so the warm pass measures hits, not LRU churn.
+    main.result_cache.maxsize = max(main.result_cache.maxsize, len(texts))
+    # Measure the in-process cache only; clear() would also wipe a shared backend.
+    main.result_cache.backend = None
+    report = {'inputs': len(texts), 'golden_revision': golden_header and golden_header.get('revision'),
+              'modes': {}, 'failures': []}
+    if golden_header is None:
+        report['failures'].append({'mode': 'golden', 'path': 'golden',
+                                   'examples': [f'{GOLDEN_PATH} is missing; run with --write-golden']})
+
+    def record(mode, path, expected, results, seconds, reference_seconds):
+        diffs = first_differences(texts, expected, [encode(result) for result in results])
+        speedup = reference_seconds / seconds if seconds else None
+        report['modes'][mode][path] = {
+            'identical': not diffs,
+            'seconds': round(seconds, 4),
+            'speedup': round(speedup, 2) if speedup else None,
+        }
+        if diffs:
+            report['failures'].append({'mode': mode, 'path': path, 'examples': diffs})
+        status = 'ok  ' if not diffs else 'DIFF'
+        if path in min_speedups and (speedup or 0) < min_speedups[path]:
+            report['failures'].append({'mode': mode, 'path': path,
+                                       'examples': [f'x{speedup or 0:.2f} is below x{min_speedups[path]:g}']})
+            status = 'SLOW' if not diffs else status
+        print(f'  {status} {path:10s} {seconds:8.3f}s  x{speedup or 0:6.2f}', file=sys.stderr)
+
+    for mode in args.mode or sorted(MODES):
+        options = MODES[mode]
+        report['modes'][mode] = {}
+        print(f'{mode} ({len(texts)} inputs)', file=sys.stderr)
+        run_reference(texts, options)  # warm the reading caches so the reference is timed hot
+        reference, reference_seconds = timed(lambda: run_reference(texts, options))
+        expected = [encode(result) for result in reference]
+        golden_diffs = [text for text, e in zip(texts, expected) if golden.get(mode, {}).get(text) != e]
+        report['modes'][mode]['golden'] = {'identical': not golden_diffs, 'differences': len(golden_diffs)}
+        if golden_diffs:
+            report['failures'].append({'mode': mode, 'path': 'golden', 'examples': golden_diffs[:5]})
+        status = 'ref ' if not golden_diffs else 'DIFF'
+        print(f'  {status} {"reference":10s} {reference_seconds:8.3f}s  '
+              f'{len(golden_diffs)} differences from the golden output', file=sys.stderr)
+
+        run_table(texts, options)
+        results, seconds = timed(lambda: run_table(texts, options))
+        record(mode, 'table', expected, results, seconds, reference_seconds)
+        main.result_cache.clear()
+        results, seconds = timed(lambda: run_cached(texts, options))
+        record(mode, 'cached', expected, results, seconds, reference_seconds)
+        results, seconds = timed(lambda: run_cached(texts, options))
+        record(mode, 'warm', expected, results, seconds, reference_seconds)
+        main.result_cache.clear()
+        results, seconds = timed(lambda: run_batched(texts, options))
+        record(mode, 'batched', expected, results, seconds, reference_seconds)
+        main.result_cache.clear()
+        output, seconds = timed(lambda: run_streamed(texts, options))
+        record(mode, 'streamed', expected, decode_lines(output), seconds, reference_seconds)
+        if args.workers > 1:
+            output, seconds = timed(lambda: run_parallel(texts, options, args.workers))
+            record(mode, 'parallel', expected, decode_lines(output), seconds, reference_seconds)
+
+    table_mismatches = check_syllable_table()
+    id_mismatches = check_id_pipeline(texts)
+    report['tables'] = {'syllables': len(main.GEORGIAN_SYLLABLE_TABLE), 'syllable_mismatches': table_mismatches,
+                        'id_pipeline_mismatches': id_mismatches[:20]}
+    if table_mismatches or id_mismatches:
+        report['failures'].append({'mode': 'tables', 'path': 'tables',
+                                   'examples': (table_mismatches + id_mismatches)[:5]})
+    print(f'tables: {len(table_mismatches)} syllable, {len(id_mismatches)} id-pipeline mismatches', file=sys.stderr)
+
+    covered, missing = check_oracle()
+    report['oracle'] = {'surnames': covered + len(missing), 'covered': covered, 'missing': missing}
+    print(f'surnames.txt: {covered}/{covered + len(missing)} expected readings produced', file=sys.stderr)
+    if covered < args.min_coverage and not args.limit:
+        report['failures'].append({'mode': 'oracle', 'path': 'surnames',
+                                   'examples': [f'{covered} covered, floor is {args.min_coverage}']})
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    for failure in report['failures']:
+        print(f'FAIL {failure["mode"]}/{failure["path"]}: {failure["examples"]}', file=sys.stderr)
+    return 1 if report['failures'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main_cli())